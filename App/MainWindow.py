@@ -1,4 +1,7 @@
+import os
 import sys
+import threading
+from itertools import islice
 import pandas as pd
 import numpy as np
 from PyQt5.QtWidgets import (
@@ -17,7 +20,8 @@ from matplotlib.figure import Figure
 from Detector.Detector import Detector
 from DataProcessing import CleanData, HandleMissingValues, DetectAndRemoveOutliers, NormalizeData, StandardizeData
 from Detector.textDetector import TextDetector
-from TextProcessing import RemoveHTMLTags, RemoveSpecialChars, HandleNumbers, TokenizeText, RemoveStopwords, NormalizeText
+from TextProcessing import RemoveHTMLTags, RemoveSpecialChars, HandleNumbers, TokenizeText, RemoveStopwords, NormalizeText, CleanText, models, Tokens, join_tokens
+from TextProcessing import iter_documents, process_stream, write_documents
 import matplotlib.pyplot as plt
 import json
 import nltk
@@ -33,11 +37,59 @@ class TextProcessor:
             'params': params
         })
     
-    def execute(self, input_text):
-        current_text = input_text
+    # Шаги очистки в порядке, в котором их собирает в один проход CleanText
+    CLEAN_ORDER = ['remove_html', 'remove_special_chars', 'handle_numbers']
+
+    def _fuse_cleaning(self):
+        """Заменить идущие подряд шаги очистки (в порядке CLEAN_ORDER) одной операцией 'clean'"""
+        operations = []
         for operation in self.operations:
+            previous = operations[-1] if operations else None
+            if operation['type'] in self.CLEAN_ORDER and previous is not None:
+                steps = previous['params']['steps'] if previous['type'] == 'clean' else [previous]
+                ranks = [self.CLEAN_ORDER.index(step['type']) for step in steps if step['type'] in self.CLEAN_ORDER]
+                if len(ranks) == len(steps) and ranks[-1] < self.CLEAN_ORDER.index(operation['type']):
+                    operations[-1] = {'type': 'clean', 'params': {'steps': steps + [operation]}}
+                    continue
+            operations.append(operation)
+        return operations
+
+    # Шаги, которые работают по словам и принимают Tokens
+    TOKEN_STEPS = ['remove_stopwords', 'normalize']
+
+    @staticmethod
+    def _is_tokens(text):
+        if isinstance(text, pd.Series):
+            first = text.first_valid_index()
+            return first is not None and isinstance(text.loc[first], Tokens)
+        return isinstance(text, Tokens)
+
+    def execute(self, input_text, strict=False):
+        """
+        Выполнить операции по порядку. Ошибка шага по умолчанию печатается и шаг
+        пропускается; при strict=True она прерывает обработку (RuntimeError).
+        """
+        current_text = input_text
+        # Текст токенизируется один раз перед первым пословным шагом и собирается в строку только в конце
+        # или перед шагом, который Tokens не принимает
+        tokenized_here = False
+        for operation in self._fuse_cleaning():
             try:
-                if operation['type'] == 'remove_html':
+                if operation['type'] in self.TOKEN_STEPS and not self._is_tokens(current_text):
+                    current_text = TokenizeText(current_text, token_type='word',
+                                                lang=operation['params']['lang']).run()
+                    tokenized_here = True
+                elif operation['type'] not in self.TOKEN_STEPS and self._is_tokens(current_text):
+                    # Очистка и токенизация работают со строками: теги и числа
+                    # после разбиения на токены уже не найти
+                    current_text = join_tokens(current_text)
+                if operation['type'] == 'clean':
+                    steps = {step['type']: step['params'] for step in operation['params']['steps']}
+                    current_text = CleanText(current_text,
+                                             remove_html='remove_html' in steps,
+                                             remove_special='remove_special_chars' in steps,
+                                             numbers=steps.get('handle_numbers', {}).get('strategy', 'keep')).run()
+                elif operation['type'] == 'remove_html':
                     current_text = RemoveHTMLTags(current_text).run()
                 elif operation['type'] == 'remove_special_chars':
                     current_text = RemoveSpecialChars(current_text).run()
@@ -57,10 +109,17 @@ class TextProcessor:
                                               method=operation['params'].get('method', 'stem'),
                                               lang=operation['params']['lang']).run()
             except Exception as e:
+                if strict:
+                    raise RuntimeError(f"Ошибка на шаге {operation['type']}: {e}") from e
                 print(f"Error in {operation['type']}: {str(e)}")
-        return current_text
+        return join_tokens(current_text) if tokenized_here else current_text
 
 class DataProcessingApp(QMainWindow):
+    # Текстовые файлы больше этого не читаются целиком: обработка идёт потоком в файл
+    STREAM_THRESHOLD = 50 * 1024 * 1024
+    # Сколько документов большого файла показывать
+    STREAM_PREVIEW = 1000
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Data Processing Tool")
@@ -68,9 +127,12 @@ class DataProcessingApp(QMainWindow):
         self.setWindowIcon(QIcon('app_icon.png'))
         self.current_data = None
         self.current_text = None
+        self.text_source = None  # путь к большому текстовому файлу, который обрабатывается потоком
         self.history = []
         self.init_ui()
         self.setup_connections()
+        # Модели natasha грузятся несколько секунд: загружаем их в фоне, пока пользователь открывает данные
+        threading.Thread(target=models.warm_up, name='models-warm-up', daemon=True).start()
     
     def init_ui(self):
         # Главный виджет и layout
@@ -619,6 +681,7 @@ class DataProcessingApp(QMainWindow):
             try:
                 self.show_progress(True)
                 processor = CleanData(self.current_data)
+                processor.set_progress_callback(self.update_progress)
                 self.current_data = processor.run()
                 self.display_data()
                 self.save_state()
@@ -640,6 +703,7 @@ class DataProcessingApp(QMainWindow):
                     categorical_strategy=self.cb_cat_strategy.currentText(),
                     fill_value=fill_value
                 )
+                processor.set_progress_callback(self.update_progress)
                 self.current_data = processor.run()
                 self.display_data()
                 self.save_state()
@@ -659,6 +723,7 @@ class DataProcessingApp(QMainWindow):
                     columns=columns,
                     method=self.cb_outlier_method.currentText().lower()
                 )
+                processor.set_progress_callback(self.update_progress)
                 self.current_data = processor.run()
                 self.display_data()
                 self.save_state()
@@ -688,6 +753,7 @@ class DataProcessingApp(QMainWindow):
                     self.current_data,
                     columns=columns
                 )
+            processor.set_progress_callback(self.update_progress)
             self.current_data = processor.run()
             self.display_data()
             self.save_state()
@@ -859,6 +925,14 @@ class DataProcessingApp(QMainWindow):
         self.progress_bar.setVisible(visible)
         self.progress_bar.setRange(0, 0 if visible else 1)
         QApplication.processEvents()
+
+    def update_progress(self, fraction, message=''):
+        """Колбэк прогресса для обработчиков DataProcessing"""
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(int(fraction * 100))
+        if message:
+            self.status_bar.showMessage(message)
+        QApplication.processEvents()
     
     def log_message(self, message, error=False):
         if error:
@@ -896,13 +970,25 @@ class DataProcessingApp(QMainWindow):
             self, 
             "Выберите текстовый файл", 
             "", 
-            "Text Files (*.txt);;CSV Files (*.csv);;Excel Files (*.xlsx);;JSON Files (*.json);;All Files (*)"
+            "Text Files (*.txt);;CSV Files (*.csv);;Excel Files (*.xlsx);;JSON Files (*.json);;"
+            "JSON Lines (*.jsonl);;All Files (*)"
         )
         if file_path:
             try:
                 # Очищаем текущий текст
                 self.current_text = None
-                if file_path.endswith('.txt'):
+                self.text_source = None
+                if (file_path.endswith(('.txt', '.csv', '.json', '.jsonl'))
+                        and os.path.getsize(file_path) > self.STREAM_THRESHOLD):
+                    # Большой файл не читаем целиком: показываем начало, обработка пойдёт потоком
+                    self.text_source = file_path
+                    self.current_text = "\n".join(islice(iter_documents(file_path), self.STREAM_PREVIEW))
+                    self.log_message(f"Файл больше {self.STREAM_THRESHOLD // 2**20} МБ: показаны первые "
+                                     f"{self.STREAM_PREVIEW} документов (для CSV — первая колонка), "
+                                     f"обработка запишет результат в файл")
+                elif file_path.endswith('.jsonl'):
+                    self.current_text = "\n".join(iter_documents(file_path))
+                elif file_path.endswith('.txt'):
                     with open(file_path, 'r', encoding='utf-8') as f:
                         self.current_text = f.read()
                 elif file_path.endswith('.csv'):
@@ -910,19 +996,13 @@ class DataProcessingApp(QMainWindow):
                     df = pd.read_csv(file_path)
                     # Формируем текст из названий столбцов и данных
                     columns = " | ".join(df.columns)
-                    data_rows = []
-                    for _, row in df.iterrows():
-                        row_str = " | ".join(str(value) for value in row.values)
-                        data_rows.append(row_str)
+                    data_rows = df.astype(str).agg(" | ".join, axis=1)
                     self.current_text = f"Columns: {columns}\n" + "\n".join(data_rows)
                 elif file_path.endswith('.xlsx'):
                     # Читаем Excel, преобразуем в удобный текстовый формат
                     df = pd.read_excel(file_path)
                     columns = " | ".join(df.columns)
-                    data_rows = []
-                    for _, row in df.iterrows():
-                        row_str = " | ".join(str(value) for value in row.values)
-                        data_rows.append(row_str)
+                    data_rows = df.astype(str).agg(" | ".join, axis=1)
                     self.current_text = f"Columns: {columns}\n" + "\n".join(data_rows)
                 elif file_path.endswith('.json'):
                     # Читаем JSON, преобразуем в текст
@@ -966,6 +1046,12 @@ class DataProcessingApp(QMainWindow):
             selected_task_type = task_type_mapping.get(self.cb_task_type.currentText(), "unknown")
             # Создаем анализатор текста с учетом типа задачи
             analyzer = TextDetector(lang=selected_lang, task_type=selected_task_type)
+            if self.text_source is not None:
+                # Большой файл анализируется потоком по всем документам
+                self.text_analysis_display.setPlainText(
+                    self.corpus_report(analyzer.analyze_corpus(iter_documents(self.text_source))))
+                self.log_message("Анализ корпуса завершен")
+                return
             # Анализируем текст
             analysis_result = analyzer.analyze_text(str(self.current_text))
             # Формируем отчет
@@ -1000,6 +1086,29 @@ class DataProcessingApp(QMainWindow):
         finally:
             self.show_progress(False)
     
+    def corpus_report(self, stats):
+        """Отчет по сводной статистике TextDetector.analyze_corpus"""
+        report = "=== Анализ корпуса ===\n"
+        report += f"📚 Документов: {stats['analyzed']}"
+        if stats['mode'] == 'sample':
+            report += f" из {stats['population']} (выборка, ±{stats['margin']:.1%} при {stats['confidence']:.0%})"
+        report += f"\n📏 Средняя длина: {stats['avg_length']:.0f} символов\n"
+        report += f"🌍 Язык: {stats['main_lang']}\n"
+        report += f"🏷️ С HTML-тегами: {stats['html_share']:.1%}\n"
+        report += f"✳️ Со спецсимволами: {stats['special_chars_share']:.1%}\n"
+        report += f"🔢 С цифрами: {stats['digits_share']:.1%}\n"
+        report += f"🛑 Доля стоп-слов: {stats['stopword_ratio']:.1%}\n"
+        length = stats['sentence_length']
+        report += (f"📐 Длина предложения: {length['mean']:.1f} ± {length['std']:.1f} токенов "
+                   f"(предложений: {length['sentences']})\n")
+        report += "Предложений по длине (токенов):\n"
+        for bucket, count in length['histogram'].items():
+            report += f" - {bucket}: {count}\n"
+        report += "\n💡 Рекомендации:\n"
+        for i, rec in enumerate(stats['recommendations'], 1):
+            report += f"{i}. {rec['description']}\n   → Действие: {rec.get('action_ru', rec['action'])}\n"
+        return report
+
     def process_text(self):
         """Обработка текста с учетом типа задачи"""
         if not self.current_text:
@@ -1051,6 +1160,10 @@ class DataProcessingApp(QMainWindow):
                                     method=method,
                                     lang=selected_lang)
             
+            if self.text_source is not None:
+                self.process_text_stream(processor)
+                return
+
             # Выполняем все операции
             processed_result = processor.execute(str(self.current_text))
             
@@ -1077,6 +1190,58 @@ class DataProcessingApp(QMainWindow):
         finally:
             self.show_progress(False)
 
+    def process_text_stream(self, processor):
+        """
+        Обработка большого файла пачками документов с записью результата по мере готовности.
+        Идёт в фоновом потоке, окно обновляет счётчик после каждой пачки. Ошибка любого
+        шага прерывает обработку: недописанный файл удаляется, ошибка пишется в журнал.
+        """
+        output_path, _ = QFileDialog.getSaveFileName(
+            self, "Сохранить результат обработки", "", "Text Files (*.txt);;JSON Lines (*.jsonl)"
+        )
+        if not output_path:
+            return
+        state = {'done': 0, 'count': None, 'error': None}
+
+        def on_batch(done):
+            state['done'] = done
+
+        def work():
+            try:
+                documents = process_stream(iter_documents(self.text_source),
+                                           lambda batch: processor.execute(batch, strict=True),
+                                           progress=on_batch)
+                state['count'] = write_documents(documents, output_path)
+            except Exception as e:
+                state['error'] = e
+
+        worker = threading.Thread(target=work, name='text-stream', daemon=True)
+        # Виджеты меняются только из потока окна: фоновый поток лишь обновляет state
+        timer = QTimer(self)
+        timer.setInterval(500)
+
+        def poll():
+            if worker.is_alive():
+                self.progress_bar.setVisible(True)
+                self.progress_bar.setRange(0, 0)
+                self.status_bar.showMessage(f"Обработано документов: {state['done']}")
+                return
+            timer.stop()
+            self.show_progress(False)
+            self.btn_process_text.setEnabled(True)
+            if state['error'] is not None:
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                self.log_message(f"Обработка прервана после {state['done']} документов: {state['error']}",
+                                 error=True)
+            else:
+                self.log_message(f"Обработано документов: {state['count']}, результат записан в {output_path}")
+
+        timer.timeout.connect(poll)
+        self.btn_process_text.setEnabled(False)
+        worker.start()
+        timer.start()
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     # Настройка стиля
@@ -5,6 +5,7 @@ from .scaling import NormalizeData
 from .scaling import StandardizeData
 from .io.loader import DataLoader
 from .auto import AutoAnal
+from .base import ProcessingCancelled
 
 __all__ = [
     'CleanData',
@@ -12,5 +13,6 @@ __all__ = [
     'DetectAndRemoveOutliers',
     'NormalizeData',
     'StandardizeData',
-    'DataLoader'
+    'DataLoader',
+    'ProcessingCancelled'
 ]
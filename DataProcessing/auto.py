@@ -16,6 +16,7 @@ class AutoAnal(DataProcessing):
         data = self.data
         if data.duplicated().any():
             cleaner = CleanData(data)  # создаём объект очистки дубликатов
+            cleaner.set_progress_callback(self._stage_callback(0.0, 0.1))
             print("Рекомендация: удалить дубликаты")
             print(cleaner.info())  # выводим информацию о действии
             data = cleaner.run()  # выполняем удаление
@@ -29,6 +30,7 @@ class AutoAnal(DataProcessing):
                 numeric_strategy='knn',
                 categorical_strategy='mode'
             )
+            missing_handler.set_progress_callback(self._stage_callback(0.1, 0.5))
             print("Рекомендация: обработать пропущенные значения")
             print(missing_handler.info())  # выводим описание действия
             try:
@@ -57,9 +59,11 @@ class AutoAnal(DataProcessing):
             return False
 
         # Если найдены выбросы, запускаем их удаление
+        self._report_progress(0.5, "Поиск выбросов")
         if has_outliers(data):
             # Используем автоматический выбор метода на основе минимальной асимметрии
             outlier_handler = DetectAndRemoveOutliers(data, method='auto')
+            outlier_handler.set_progress_callback(self._stage_callback(0.5, 0.9))
             print("Рекомендация: удалить выбросы (автоматически подобранный метод)")
             print(outlier_handler.info())  # отображаем, что будет сделано
             try:
@@ -80,6 +84,7 @@ class AutoAnal(DataProcessing):
 
             if need_normalize:
                 normalizer = NormalizeData(data)  # создаём объект нормализации
+                normalizer.set_progress_callback(self._stage_callback(0.9, 1.0))
                 print("Рекомендация: нормализовать числовые данные")
                 print(normalizer.info())  # выводим описание действия
                 data = normalizer.run()  # выполняем нормализацию
@@ -1,12 +1,51 @@
 import pandas as pd
 from abc import ABC, abstractmethod
-from typing import Union, Optional
+from functools import wraps
+from typing import Callable, Union, Optional
 from flaml import AutoML
 from sklearn.model_selection import train_test_split
+from Logger.metrics import timed
+from Logger.profiling import Profilable, profiled
 #from io.loader import DataLoader
 
-class DataProcessing(ABC):
-    def __init__(self, data: Union[pd.DataFrame, str], file_type: Optional[str] = None):
+ProgressCallback = Callable[[float, str], None]
+
+
+class ProcessingCancelled(BaseException):
+    """
+    Обработка прервана колбэком прогресса.
+
+    Наследуется от BaseException, чтобы её не глушили блоки except Exception
+    внутри обработчиков (как asyncio.CancelledError).
+    """
+
+
+def _track_progress(run):
+    """Сообщать о начале и конце run() каждого обработчика и снимать его метрики"""
+    @wraps(run)
+    def wrapper(self, *args, **kwargs):
+        name = type(self).__name__
+        data = getattr(self, 'data', None)
+        size = {}
+        if isinstance(data, pd.DataFrame):
+            size = {'rows': len(data), 'nbytes': int(data.memory_usage(index=True).sum())}
+        self._report_progress(0.0, f"{name}: старт")
+        with timed(name, **size):
+            result = run(self, *args, **kwargs)
+        self._report_progress(1.0, f"{name}: готово")
+        return result
+    return wrapper
+
+
+class DataProcessing(Profilable, ABC):
+    progress_callback: Optional[ProgressCallback] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'run' in cls.__dict__:
+            cls.run = _track_progress(profiled(cls.run))
+
+    def __init__(self, data: Union[pd.DataFrame, str], file_type: Optional[str] = None, copy: bool = True):
         """
         Базовый класс для обработки данных.
         
@@ -16,9 +55,12 @@ class DataProcessing(ABC):
             Может быть либо DataFrame, либо путь к файлу с данными
         file_type : Optional[str]
             Тип файла (если data - строка), например 'xlsx', 'json', 'parquet'
+        copy : bool
+            Копировать переданный DataFrame. False — для обработчиков, которые
+            сами копируют данные в run() и не меняют self.data
         """
         if isinstance(data, pd.DataFrame):
-            self.data = data.copy()
+            self.data = data.copy() if copy else data
         elif isinstance(data, str):
             self.data = DataLoader.load_data(data, file_type)
         else:
@@ -41,6 +83,29 @@ class DataProcessing(ABC):
         """Получить результат обработки"""
         pass
 
+    def set_progress_callback(self, callback: Optional[ProgressCallback]) -> 'DataProcessing':
+        """
+        Подписаться на прогресс обработки
+
+        Параметры:
+        -----------
+        callback : Optional[Callable[[float, str], None]]
+            Вызывается с долей выполненной работы (0..1) и сообщением.
+            Чтобы отменить обработку, колбэк выбрасывает ProcessingCancelled.
+        """
+        self.progress_callback = callback
+        return self
+
+    def _report_progress(self, fraction: float, message: str = '') -> None:
+        if self.progress_callback is not None:
+            self.progress_callback(min(max(fraction, 0.0), 1.0), message)
+
+    def _stage_callback(self, start: float, end: float) -> Optional[ProgressCallback]:
+        """Колбэк для вложенного обработчика, отображающий его прогресс на отрезок [start, end]"""
+        if self.progress_callback is None:
+            return None
+        return lambda fraction, message='': self._report_progress(start + (end - start) * fraction, message)
+
     def _select_numeric_columns(self) -> list:
         """
         Выбрать числовые столбцы
@@ -70,14 +135,17 @@ class DataProcessing(ABC):
         DataLoader.save_data(self.result, file_path, file_type, **kwargs)
 
     def ml_proc(self, target:str):
+        self._report_progress(0.0, "Подготовка выборок")
         x = self.data.drop(target)
         y = self.data[target]
 
         X_train, X_test, y_train, y_test = train_test_split(x, y, random_state=42)
         X_train, X_test, y_train, y_test = train_test_split(x, y, random_state=42)
 
+        self._report_progress(0.05, "Подбор модели AutoML")
         automl = AutoML()
         automl.fit(X_train=X_train, y_train=y_train, task='classification', time_budget=60)
+        self._report_progress(0.9, "Предсказание")
         y_pred = automl.predict(X_test)
 
         best_model = automl.model.estimator
@@ -98,4 +166,5 @@ class DataProcessing(ABC):
         }).sort_values('Importance', ascending=False)
         print(features_df)
         features_df.to_csv('weights.csv')
+        self._report_progress(1.0, "Важность признаков сохранена")
         return 0
@@ -6,12 +6,13 @@ from sklearn.experimental import enable_iterative_imputer
 from sklearn.impute import IterativeImputer
 
 
-class HandleMissingValues:
+class HandleMissingValues(DataProcessing):
     def __init__(self, data: pd.DataFrame,
                  numeric_strategy: str = 'knn',
                  categorical_strategy: str = 'mode',
                  fill_value: dict = None):
-        self.data = data
+        # run() копирует данные сам: вторая копия в конструкторе не нужна
+        super().__init__(data, copy=False)
         self.numeric_strategy = numeric_strategy
         self.categorical_strategy = categorical_strategy
         self.fill_value = fill_value or {}
@@ -28,6 +29,7 @@ class HandleMissingValues:
         # Получаем списки колонок по типу
         numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
         categorical_cols = df.select_dtypes(exclude=['number']).columns.tolist()
+        total = len(numeric_cols) + len(categorical_cols) or 1
 
         # === Числовые колонки ===
         if self.numeric_strategy in ['knn', 'iterative']:
@@ -41,6 +43,7 @@ class HandleMissingValues:
                     #logging.info("Применяется IterativeImputer")
                     imputer = IterativeImputer(max_iter=10, random_state=42)
 
+                self._report_progress(0.0, f"Заполнение пропусков: {self.numeric_strategy}")
                 try:
                     df[numeric_cols] = imputer.fit_transform(df[numeric_cols])
                 except Exception as e:
@@ -48,7 +51,8 @@ class HandleMissingValues:
                     #logging.error(f"Ошибка при применении {self.numeric_strategy}: {e}")
         else:
             # Обрабатываем каждый числовой столбец отдельно
-            for col in numeric_cols:
+            for i, col in enumerate(numeric_cols):
+                self._report_progress(i / total, f"Заполнение пропусков: {col}")
                 if df[col].isnull().any():
                     if self.numeric_strategy == 'mean':
                         df[col] = df[col].fillna(df[col].mean())
@@ -63,7 +67,8 @@ class HandleMissingValues:
                         raise ValueError(f"Неизвестная числовая стратегия: {self.numeric_strategy}")
 
         # === Категориальные колонки ===
-        for col in categorical_cols:
+        for i, col in enumerate(categorical_cols, start=len(numeric_cols)):
+            self._report_progress(i / total, f"Заполнение пропусков: {col}")
             if df[col].isnull().any():
                 if self.categorical_strategy == 'mode':
                     mode_val = df[col].mode()
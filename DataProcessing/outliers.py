@@ -68,7 +68,8 @@ class DetectAndRemoveOutliers(DataProcessing):
             best_score = np.inf
             best_method = None
             best_df = None
-            for name, method_func in methods.items():
+            for i, (name, method_func) in enumerate(methods.items()):
+                self._report_progress(i / len(methods), f"Пробуем метод {name}")
                 temp_df = method_func(df.copy())
                 score = self._evaluate_skewness(temp_df)
                 # Логируем результаты
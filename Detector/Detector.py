@@ -2,9 +2,11 @@ import pandas as pd
 import numpy as np
 from ydata_profiling import ProfileReport
 import json
+from Logger.metrics import timed
+from Logger.profiling import Profilable, profiled
 
 
-class Detector:
+class Detector(Profilable):
     def __init__(self, check_abnormal:bool, check_missing:bool, check_duplicates:bool, check_scaling:bool, hampel_threshold:float = 3.0,
                  iqr_multiplier:float = 1.5, skewness_threshold:float = 2.0, kurtosis_threshold:float = 3.5):
         self.check_abnormal = check_abnormal
@@ -17,6 +19,8 @@ class Detector:
         self.kurtosis_threshold = kurtosis_threshold
 
 
+    @timed('Detector')
+    @profiled
     def check_dataframe(self, filename, is_df=False):
 
         '''Проверка на наличие пропущенные значений, дубликатов, выбросов и рекомендации по нормализации/
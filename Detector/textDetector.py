@@ -1,28 +1,129 @@
 import pandas as pd
 import re
 from langdetect import detect, DetectorFactory
+import hashlib
 import json
+import math
 import sys
-from collections import Counter
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer, WordNetLemmatizer
-from typing import Dict, Union, List
+from collections import Counter, OrderedDict
+from statistics import NormalDist
+from typing import Dict, Iterable, Optional, Tuple, Union, List
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 from pathlib import Path
+from Logger.profiling import Profilable, profiled
+from TextProcessing.models import models
+from TextProcessing.memo import token_memo
+from TextProcessing.tokenizers import get_tokenizer
+from TextProcessing.streaming import STREAM_BATCH_SIZE, iter_batches, iter_documents
+from TextProcessing.fused import re2_class
 #from Logger import *
 
-class TextDetector:
+# Объём кэша токенизаций одного TextDetector по умолчанию
+TOKEN_CACHE_BYTES = 64 * 1024 * 1024
+# Доля документов корпуса, начиная с которой рекомендуется очистка (HTML, спецсимволы, числа)
+CORPUS_MIN_SHARE = 0.01
+# Границы гистограммы длины предложений корпуса (в токенах)
+SENTENCE_LENGTH_BINS = [0, 5, 10, 15, 20, 30, 50, np.inf]
+
+
+def sample_size_for(population: Optional[int], margin: float = 0.01, confidence: float = 0.95) -> int:
+    """
+    Размер простой случайной выборки, при котором любая доля (например,
+    доля документов с HTML) оценивается с погрешностью не больше margin
+    на уровне доверия confidence. Берётся худший случай p = 0.5 и поправка
+    на конечную генеральную совокупность population.
+    """
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    n = z * z * 0.25 / (margin * margin)
+    if population:
+        n = n / (1 + (n - 1) / population)
+        return min(population, math.ceil(n))
+    return math.ceil(n)
+
+
+class TokenCache:
+    """
+    LRU-кэш токенизаций, ограниченный по объёму.
+
+    Ключ — дайджест blake2b содержимого текста и тип токенов, поэтому
+    разные тексты не сталкиваются, как при hash(text). Объём записи —
+    размер кортежа и строк токенов по sys.getsizeof; при превышении
+    max_bytes вытесняются давно не использованные записи. Токены хранятся
+    кортежем, чтобы вызывающий код не мог изменить запись кэша.
+    """
+
+    def __init__(self, max_bytes: int = TOKEN_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(text: str, token_type: str) -> tuple:
+        return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest(), token_type
+
+    @staticmethod
+    def _size(tokens: Tuple[str, ...]) -> int:
+        return sys.getsizeof(tokens) + sum(map(sys.getsizeof, tokens))
+
+    def get(self, text: str, token_type: str) -> Optional[Tuple[str, ...]]:
+        key = self._key(text, token_type)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, text: str, token_type: str, tokens: List[str]) -> None:
+        key = self._key(text, token_type)
+        tokens = tuple(tokens)
+        size = self._size(tokens)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (tokens, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        calls = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'items': len(self._entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                'hit_rate': self.hits / calls if calls else 0.0}
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TextDetector(Profilable):
     def __init__(self, 
                  task_type: str = 'unknown',
                  check_clean: bool = True,
                  check_tokenize: bool = True,
                  check_stopwords: bool = True,
                  check_stem_lemm: bool = True,
-                 lang: str = None): 
+                 lang: str = None,
+                 tokenizer: str = 'nltk',
+                 token_cache_bytes: int = TOKEN_CACHE_BYTES): 
         """
         Параметры:
         - lang: язык текста ('english', 'russian' и т.д.)
+        - tokenizer: токенизатор по словам: 'nltk' (word_tokenize) или 'regex' (быстрый regex_tokenize)
+        - token_cache_bytes: предельный объём кэша токенизаций (см. TokenCache)
         - task_type: тип NLP-задачи, для которой будет использоваться токенизация.
             Влияет на рекомендации. 
             Допустимые значения:
@@ -41,17 +142,18 @@ class TextDetector:
         self.check_stopwords = check_stopwords
         self.check_stem_lemm = check_stem_lemm
         self.lang = lang
+        self.tokenize = get_tokenizer(tokenizer)
         # Ленивая инициализация
         self._stop_words = None
         self._ps = None
         self._lemmatizer = None
-        self._token_cache = {}
+        self._token_cache = TokenCache(token_cache_bytes)
         
     @property
     def stop_words(self):
         if self._stop_words is None:
             try:
-                self._stop_words = set(stopwords.words(self.lang))
+                self._stop_words = models.get('nltk.stopwords', self.lang)
             except:
                 print(f"[WARNING] Не удалось загрузить стоп-слова для языка {self.lang}", file=sys.stderr)
                 self._stop_words = set()
@@ -60,17 +162,20 @@ class TextDetector:
     @property
     def ps(self):
         if self._ps is None:
-            self._ps = PorterStemmer()
+            self._ps = models.get('nltk.porter')
         return self._ps
     
     @property
     def lemmatizer(self):
         if self._lemmatizer is None:
-            self._lemmatizer = WordNetLemmatizer()
+            self._lemmatizer = models.get('nltk.wordnet')
         return self._lemmatizer
     
     def load_text_from_file(self, file_path: Union[str, Path]) -> str:
-        """Оптимизированная загрузка файлов с кэшированием"""
+        """
+        Загрузка файла одной строкой. Для больших файлов лучше
+        TextProcessing.iter_documents — он отдаёт документы по одному.
+        """
         file_path = Path(file_path)
         
         if not file_path.exists():
@@ -80,10 +185,9 @@ class TextDetector:
             with open(file_path, 'r', encoding='utf-8') as f:
                 return f.read()
                 
-        elif file_path.suffix == '.csv':
-            # Используем только нужные колонки
-            df = pd.read_csv(file_path, usecols=[0])
-            return ' '.join(df.iloc[:, 0].astype(str).tolist())
+        elif file_path.suffix in ('.csv', '.jsonl'):
+            # Первая колонка CSV или поле 'text' JSONL читаются пачками, без DataFrame целиком
+            return ' '.join(iter_documents(file_path))
             
         elif file_path.suffix == '.json':
             with open(file_path, 'r', encoding='utf-8') as f:
@@ -95,6 +199,7 @@ class TextDetector:
         else:
             raise ValueError(f"Неподдерживаемый формат файла: {file_path.suffix}")
     
+    @profiled
     def analyze_text(self, text: Union[str, pd.Series]) -> Dict:
         """Оптимизированный анализ с кэшированием промежуточных результатов"""
         if isinstance(text, pd.Series):
@@ -109,22 +214,24 @@ class TextDetector:
             'detected_lang': self._detect_language(text),
             'stopword_ratio': self._stopword_ratio(words, self._detect_language(text)) if self.check_stopwords else None,
             'stem_vs_lemma': self._compare_stem_lemm(words) if self.check_stem_lemm else None,
-            'words': words,
-            'sentences': sentences
+            # Копии: кэш хранит кортежи, а вызывающий код может менять списки
+            'words': list(words),
+            'sentences': list(sentences)
         }
         
         metrics['recommendations'] = self._generate_recommendations(text, metrics)
         return metrics
 
-    def _get_cached_tokenization(self, text: str, token_type: str) -> List[str]:
+    def _get_cached_tokenization(self, text: str, token_type: str) -> Tuple[str, ...]:
         """Кэширование результатов токенизации"""
-        cache_key = (hash(text), token_type)
-        if cache_key not in self._token_cache:
+        tokens = self._token_cache.get(text, token_type)
+        if tokens is None:
             if token_type == 'words':
-                self._token_cache[cache_key] = word_tokenize(text)
+                tokens = tuple(self.tokenize(text))
             else:
-                self._token_cache[cache_key] = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
-        return self._token_cache[cache_key]
+                tokens = tuple(s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip())
+            self._token_cache.put(text, token_type, tokens)
+        return tokens
 
     def _analyze_series(self, series: pd.Series) -> Dict:
         """Оптимизированный анализ серии с выборкой"""
@@ -132,18 +239,160 @@ class TextDetector:
         samples = series.sample(sample_size, random_state=42)  # Фиксируем random_state для воспроизводимости
         
         analyses = []
+        # Кэш ограничен по объёму, поэтому между выборками не очищается:
+        # повторные тексты и повторные вызовы берут токены из него
         for text in samples:
-            analysis = self.analyze_text(text)
-            analyses.append(analysis)
-            # Очищаем кэш после каждого анализа для экономии памяти
-            self._token_cache.clear()
+            analyses.append(self.analyze_text(text))
         
         return {
             'avg_length': np.mean([a['length'] for a in analyses]),
             'main_lang': Counter([a['detected_lang'] for a in analyses]).most_common(1)[0][0],
-            'recommendations': list(set(r for a in analyses for r in a['recommendations']))
+            # Рекомендации — словари, поэтому повторы убираются по действию
+            'recommendations': list({r['action']: r for a in analyses for r in a['recommendations']}.values())
         }
 
+    @profiled
+    def analyze_corpus(self, texts: Union[pd.Series, Iterable[str]], full: bool = False,
+                       margin: float = 0.01, confidence: float = 0.95,
+                       batch_size: int = STREAM_BATCH_SIZE, random_state: int = 42) -> Dict:
+        """
+        Анализ корпуса целиком: сводная статистика по документам вместо
+        разбора пяти случайных строк, как в analyze_text(Series).
+
+        Доли документов с HTML, спецсимволами и цифрами, доля стоп-слов,
+        средняя длина и распределение длины предложений считаются векторно
+        (регулярные выражения pyarrow) пачками по batch_size документов.
+        Длина предложения — в токенах, как len(words) / len(sentences) у
+        analyze_text: слова и знаки препинания отдельно (слова через дефис
+        и многоточие — один токен); гистограмма — по всем предложениям.
+
+        Параметры:
+        - texts: Series или любой поток строк (например, iter_documents(path))
+        - full: обойти все документы; иначе по Series берётся случайная
+            выборка размера sample_size_for(len, margin, confidence).
+            Поток без длины всегда обходится целиком
+        - margin, confidence: требуемая погрешность долей и уровень доверия
+        """
+        population = None
+        if isinstance(texts, pd.Series):
+            texts = texts[texts.map(lambda value: isinstance(value, str))]
+            population = len(texts)
+            size = population if full else sample_size_for(population, margin, confidence)
+            if size < population:
+                texts = texts.sample(size, random_state=random_state)
+            texts = texts.tolist()
+
+        totals = Counter()
+        histogram = np.zeros(len(SENTENCE_LENGTH_BINS) - 1, dtype=np.int64)
+        lang = self.lang
+        for batch in iter_batches(texts, batch_size):
+            batch = [text for text in batch if isinstance(text, str)]
+            if not batch:
+                continue
+            if lang is None:
+                lang = Counter(map(self._detect_language, batch[:20])).most_common(1)[0][0]
+            lengths = self._corpus_batch(pa.array(batch, type=pa.large_string()), lang, totals)
+            histogram += np.histogram(lengths, bins=SENTENCE_LENGTH_BINS)[0]
+
+        docs = totals['docs']
+        if not docs:
+            raise ValueError("Нет документов для анализа")
+        sampled = population is not None and docs < population
+        sentences = totals['sentences']
+        mean_length = totals['sentence_tokens'] / sentences if sentences else 0.0
+        stats = {
+            'mode': 'sample' if sampled else 'full',
+            'population': population,
+            'analyzed': docs,
+            'confidence': confidence,
+            'margin': self._margin(docs, population, confidence) if sampled else 0.0,
+            'main_lang': lang,
+            'avg_length': totals['chars'] / docs,
+            'html_share': totals['html'] / docs,
+            'special_chars_share': totals['special'] / docs,
+            'digits_share': totals['digits'] / docs,
+            'question_share': totals['questions'] / docs,
+            'stopword_ratio': totals['stopwords'] / totals['tokens'] if totals['tokens'] else 0.0,
+            'sentence_length': {
+                'sentences': sentences,
+                'mean': mean_length,
+                'std': math.sqrt(max(0.0, totals['sentence_tokens_sq'] / sentences - mean_length ** 2))
+                if sentences else 0.0,
+                'histogram': {f"{low:g}-{high:g}": int(count) for low, high, count
+                              in zip(SENTENCE_LENGTH_BINS, SENTENCE_LENGTH_BINS[1:], histogram)},
+            },
+        }
+        stats['recommendations'] = self._corpus_recommendations(stats)
+        return stats
+
+    def _corpus_batch(self, texts: pa.Array, lang: str, totals: Counter) -> np.ndarray:
+        """Добавить счётчики пачки в totals; вернуть длины (в токенах) всех предложений пачки"""
+        totals['docs'] += len(texts)
+        totals['chars'] += pc.sum(pc.utf8_length(texts)).as_py() or 0
+        # Те же признаки, что у _get_cleaning_rec, но с классами Unicode для RE2
+        totals['html'] += pc.sum(pc.match_substring_regex(texts, r'<[^>]+>')).as_py() or 0
+        totals['special'] += pc.sum(pc.match_substring_regex(texts, re2_class(r'[^\w\s.,!?]'))).as_py() or 0
+        totals['digits'] += pc.sum(pc.match_substring_regex(texts, re2_class(r'\d'))).as_py() or 0
+        totals['questions'] += pc.sum(pc.match_substring(texts, '?')).as_py() or 0
+
+        if self.check_stopwords:
+            # Токены как у simple_tokenize: слова и отдельные знаки
+            spaced = pc.replace_substring_regex(pc.utf8_lower(texts), pattern=re2_class(r'[^\w\s]'),
+                                                replacement=' \\0 ')
+            tokens = pc.list_flatten(pc.utf8_split_whitespace(spaced))
+            tokens = tokens.filter(pc.not_equal(tokens, ''))
+            try:
+                stop_words = models.get('nltk.stopwords', lang)
+            except Exception:
+                stop_words = frozenset()
+            totals['tokens'] += len(tokens)
+            totals['stopwords'] += pc.sum(pc.is_in(tokens, value_set=pa.array(sorted(stop_words),
+                                                                           type=tokens.type))).as_py() or 0
+
+        # Предложения — как в _get_cached_tokenization: делим по пробелам после [.!?], пустые отбрасываем
+        space, word, mark = re2_class(r'\s'), re2_class(r'\w'), re2_class(r'[^\w\s]')
+        marked = pc.replace_substring_regex(texts, pattern=f'([.!?]){space}+', replacement='\\1\x00')
+        sentences = pc.utf8_trim_whitespace(pc.list_flatten(pc.split_pattern(marked, '\x00')))
+        sentences = sentences.filter(pc.not_equal(sentences, ''))
+        # Токены близко к word_tokenize: слово (с дефисами и апострофами), многоточие или знак
+        token = f"{word}+(?:[-'’]{word}+)*|\\.{{2,}}|{mark}"
+        lengths = pc.count_substring_regex(sentences, token).to_numpy()
+        totals['sentences'] += len(lengths)
+        totals['sentence_tokens'] += int(lengths.sum())
+        totals['sentence_tokens_sq'] += int((lengths.astype(np.int64) ** 2).sum())
+        return lengths
+
+    @staticmethod
+    def _margin(sample: int, population: int, confidence: float) -> float:
+        """Погрешность доли (худший случай p = 0.5) для выборки из конечной совокупности"""
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        correction = (population - sample) / (population - 1) if population > 1 else 0.0
+        return z * math.sqrt(0.25 / sample * correction)
+
+    def _corpus_recommendations(self, stats: Dict) -> List[Dict]:
+        """Рекомендации по сводной статистике корпуса, с теми же порогами, что и для одного текста"""
+        recommendations = []
+        if self.check_clean:
+            shares = [('remove_html', 'html_share', 'HTML-теги'),
+                      ('remove_special_chars', 'special_chars_share', 'спецсимволы'),
+                      ('handle_numbers', 'digits_share', 'цифры')]
+            for action, key, what in shares:
+                if stats[key] >= CORPUS_MIN_SHARE:
+                    recommendations.append({'action': action,
+                                            'description': f'{stats[key]:.0%} документов содержат {what}'})
+        if self.check_tokenize:
+            if self.task_type != 'unknown':
+                recommendations.extend(self._get_tokenization_rec({}))
+            elif stats['sentence_length']['mean'] > 15:
+                recommendations.append({"action": "sentence_tokenize", "description": "Длинные предложения (>15 слов)"})
+            elif stats['question_share'] >= CORPUS_MIN_SHARE:
+                recommendations.append({"action": "sentence_tokenize", "description": "Наличие вопросов"})
+            else:
+                recommendations.append({"action": "word_tokenize", "description": "Стандартная рекомендация"})
+        if self.check_stopwords:
+            recommendations.extend(self._get_stopwords_rec(stats['stopword_ratio']))
+        return self._translate_actions(recommendations)
+
     def _detect_language(self, text: str) -> str:
         """Определение языка с использованием langdetect"""
         if self.lang:  # Если язык задан явно
@@ -163,7 +412,7 @@ class TextDetector:
             
         # Обновляем стоп-слова для текущего языка
         try:
-            self._stop_words = set(stopwords.words(lang))
+            self._stop_words = models.get('nltk.stopwords', lang)
         except:
             self._stop_words = set()
             
@@ -172,8 +421,9 @@ class TextDetector:
 
     def _compare_stem_lemm(self, words: List[str]) -> Dict:
         """Оптимизированное сравнение стемминга и лемматизации"""
-        stemmed = [self.ps.stem(word) for word in words]
-        lemmatized = [self.lemmatizer.lemmatize(word) for word in words]
+        # Стемминг и лемматизация по токенам кэшируются в token_memo (общем с NormalizeText)
+        stemmed = list(map(token_memo.wrap('english', 'porter', self.ps.stem), words))
+        lemmatized = list(map(token_memo.wrap('english', 'lemmatize', self.lemmatizer.lemmatize), words))
         
         return {
             'stem_diff': sum(1 if s != l else 0 for s, l in zip(stemmed, lemmatized)),
@@ -192,6 +442,10 @@ class TextDetector:
         if self.check_stem_lemm and metrics['stem_vs_lemma'] is not None:
             recommendations.extend(self._get_stemm_lemm_rec(metrics['stem_vs_lemma']))
         
+        return self._translate_actions(recommendations)
+
+    @staticmethod
+    def _translate_actions(recommendations: List[Dict]) -> List[Dict]:
         # Маппинг английских действий на русские
         action_translation = {
             'remove_html': 'Удалить HTML-теги',
@@ -8,12 +8,14 @@ class DataObject(BaseModel):
 
 class IDProcessing:
     __METHODS__ = [CleanData, HandleMissingValues, NormalizeData, StandardizeData, DetectAndRemoveOutliers, AutoAnal]
-    def __init__(self, request: DataObject):
+    def __init__(self, request: DataObject, progress_callback=None):
         self.method_id = request.method_id
         self.params = request.params
+        self.progress_callback = progress_callback
 
     @decorator
     def get(self):
         process = self.__METHODS__[self.method_id](*self.params)
+        process.set_progress_callback(self.progress_callback)
         process.run()
         return process.get_answ()
\ No newline at end of file
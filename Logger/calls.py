@@ -0,0 +1,171 @@
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, List, Optional
+
+
+def shape_of(value: Any) -> Optional[list]:
+    """Размер значения: shape у таблиц и массивов, длина у строк и коллекций"""
+    shape = getattr(value, 'shape', None)
+    if isinstance(shape, tuple):
+        return list(shape)
+    if isinstance(value, (str, bytes, list, tuple, dict, set)):
+        return [len(value)]
+    return None
+
+
+def input_shape(args: tuple) -> Optional[list]:
+    """Размер входа вызова: первый аргумент с размером, для методов — self.data"""
+    for arg in args:
+        shape = shape_of(arg)
+        if shape is None:
+            shape = shape_of(getattr(arg, 'data', None))
+        if shape is not None:
+            return shape
+    return None
+
+
+class _Call:
+    __slots__ = ('function', 'args', 'wall', 'cpu', 'memory', 'memory_base')
+
+    def __init__(self, function: str, args: tuple, memory: bool):
+        self.function = function
+        self.args = args
+        self.memory = memory
+        self.memory_base = 0
+        if memory:
+            tracemalloc.reset_peak()
+            self.memory_base = tracemalloc.get_traced_memory()[0]
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+
+
+class CallRecorder:
+    """
+    Структурные записи о вызовах функций под декоратором Logger.
+
+    Для доли вызовов sample_rate сохраняет время (настенное и процессорное
+    время процесса) и размеры входа и выхода. Записи идут в кольцевой буфер
+    на capacity элементов (recent()) и, если задан path, построчно в
+    JSON-файл. Файл ротируется по размеру max_bytes: прежний переименовывается
+    в path.1 (одна старая копия).
+
+    Прирост пиковой памяти (tracemalloc) меряется только у доли memory_rate
+    записываемых вызовов, по умолчанию — ни у одного: под трассировкой весь
+    вызов идёт в разы медленнее. Меряется только внешний вызов: вложенные
+    сбросили бы его пик. Если tracemalloc уже включён кем-то ещё, он не
+    выключается. tracemalloc общий на процесс, поэтому в пик попадают и
+    выделения параллельных потоков.
+    """
+
+    def __init__(self, path: Optional[str] = None, sample_rate: float = 0.1,
+                 capacity: int = 1000, memory_rate: float = 0.0,
+                 max_bytes: int = 10 * 1024 ** 2):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.memory_rate = memory_rate
+        self.max_bytes = max_bytes
+        self.buffer: deque = deque(maxlen=capacity)
+        self._file = None
+        self._lock = threading.Lock()
+        self._measuring = False
+        self._started_tracing = False
+
+    def start(self, function: str, args: tuple) -> Optional[_Call]:
+        """Начать запись вызова; None — вызов не попал в выборку"""
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return None
+        memory = False
+        if self.memory_rate > 0 and (self.memory_rate >= 1 or random.random() < self.memory_rate):
+            with self._lock:
+                if not self._measuring:
+                    self._measuring = memory = True
+                    if not tracemalloc.is_tracing():
+                        tracemalloc.start()
+                        self._started_tracing = True
+        return _Call(function, args, memory)
+
+    def finish(self, call: Optional[_Call], result: Any = None, status: str = 'ok') -> None:
+        """Завершить запись вызова: status — 'ok', 'error' или 'cancelled'"""
+        if call is None:
+            return
+        wall = time.perf_counter() - call.wall
+        cpu = time.process_time() - call.cpu
+        memory_peak = None
+        if call.memory:
+            memory_peak = tracemalloc.get_traced_memory()[1] - call.memory_base
+            with self._lock:
+                if self._started_tracing:
+                    tracemalloc.stop()
+                    self._started_tracing = False
+                self._measuring = False
+        record = {
+            'ts': time.time(),
+            'pid': os.getpid(),
+            'function': call.function,
+            'status': status,
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'in_shape': input_shape(call.args),
+            'out_shape': shape_of(result) if status == 'ok' else None,
+            'memory_peak_bytes': memory_peak,
+        }
+        self.buffer.append(record)
+        if self.path:
+            self._write(record)
+
+    def recent(self, n: Optional[int] = None) -> List[dict]:
+        """Последние n записей (все, если n не задано)"""
+        records = list(self.buffer)
+        return records if n is None else records[-n:]
+
+    def configure(self, path: Optional[str] = None, sample_rate: Optional[float] = None,
+                  capacity: Optional[int] = None, memory_rate: Optional[float] = None,
+                  max_bytes: Optional[int] = None) -> None:
+        with self._lock:
+            if path is not None and path != self.path:
+                self.close()
+                self.path = path
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+            if capacity is not None:
+                self.buffer = deque(self.buffer, maxlen=capacity)
+            if memory_rate is not None:
+                self.memory_rate = memory_rate
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, 'a', encoding='utf-8')
+                if self.max_bytes and self._file.tell() + len(line) > self.max_bytes:
+                    self._rotate()
+                self._file.write(line)
+                self._file.flush()
+            except OSError:
+                # Запись метрик не должна ломать сам вызов: остаёмся только с буфером
+                self.close()
+                self.path = None
+
+    def _rotate(self) -> None:
+        self.close()
+        os.replace(self.path, self.path + '.1')
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+
+# Без DPRO_TRACE_PATH записи остаются только в кольцевом буфере
+recorder = CallRecorder(path=os.environ.get('DPRO_TRACE_PATH') or None,
+                        sample_rate=float(os.environ.get('DPRO_TRACE_SAMPLE', 0.1)),
+                        memory_rate=float(os.environ.get('DPRO_TRACE_MEMORY', 0.0)))
@@ -1,20 +1,139 @@
+import atexit
 import logging
-from time import asctime
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from time import asctime, perf_counter
 from functools import wraps
+from typing import Optional
+
+from .calls import recorder
+from .metrics import CALLS, CALL_SECONDS
 
 FORMAT = '%(asctime)s %(message)s'
-logging.basicConfig(filename='Logger/processing_logs.log', level=logging.INFO, format=FORMAT)
+DEFAULT_LOG_PATH = Path(__file__).with_name('processing_logs.log')
 logger = logging.getLogger(__name__)
 
+_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+_settings: Optional[dict] = None
+# Журнал родительского процесса, если этот процесс — форк
+_parent_path: Optional[str] = None
+
+
+class _LocalQueueHandler(QueueHandler):
+    """
+    Очередь живёт в этом же процессе, поэтому запись не нужно готовить
+    к сериализации: форматирование целиком уходит в поток записи.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(path: Optional[str] = None, level: int = logging.INFO,
+                      max_bytes: int = 10 * 1024 ** 2, backup_count: int = 5) -> Path:
+    """
+    Настроить журнал обработки.
+
+    Вызывающий поток только кладёт запись в очередь, в файл её пишет
+    фоновый поток (QueueListener). Файл ротируется по размеру max_bytes,
+    хранится backup_count старых копий. Путь по умолчанию — переменная
+    DPRO_LOG_PATH или processing_logs.log рядом с пакетом Logger.
+    Повторный вызов заменяет прежнюю настройку.
+
+    Возвращает путь к файлу журнала.
+    """
+    global _handler, _listener, _settings
+    stop_logging()
+    log_path = Path(path or os.environ.get('DPRO_LOG_PATH') or DEFAULT_LOG_PATH)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+
+    file_handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count,
+                                       encoding='utf-8', delay=True)
+    file_handler.setFormatter(logging.Formatter(FORMAT))
+    log_queue = queue.SimpleQueue()
+    _handler = _LocalQueueHandler(log_queue)
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level)
+    _settings = {'path': str(log_path), 'level': level, 'max_bytes': max_bytes, 'backup_count': backup_count}
+    return log_path
+
+
+def stop_logging() -> None:
+    """Дописать очередь в файл и снять обработчики"""
+    global _handler, _listener
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def worker_log_path(path: str, pid: Optional[int] = None) -> Path:
+    """Файл журнала дочернего процесса: processing_logs.<pid>.log рядом с основным"""
+    path = Path(path)
+    return path.with_name(f'{path.stem}.{pid or os.getpid()}{path.suffix}')
+
+
+def _after_fork() -> None:
+    # Поток записи в дочерний процесс не копируется: без него очередь только росла бы.
+    # Ребёнок пишет в свой файл: если несколько процессов ротируют один файл,
+    # записи теряются или попадают не в тот файл
+    global _handler, _listener, _parent_path
+    if _settings is None:
+        return
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+    _handler = _listener = None
+    _parent_path = _parent_path or _settings['path']
+    configure_logging(**dict(_settings, path=worker_log_path(_parent_path)))
+
+
+configure_logging()
+atexit.register(stop_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
 def decorator(func):
+    name = func.__qualname__
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        logger.info(f'{func.__name__} started')
+        # Одна запись на вызов: строка о старте нужна только при отладке
+        logger.debug('%s started', func.__name__)
+        call = recorder.start(name, args)
+        start = perf_counter()
         try:
             result = func(*args, **kwargs)
-            logger.info(f'{func.__name__} finished successfully')
-            return result
         except Exception as e:
-            logger.error(f'Error in {func.__name__}: {str(e)}')
+            elapsed = perf_counter() - start
+            logger.error('Error in %s: %s', func.__name__, e)
+            CALLS.inc(function=name, status='error')
+            CALL_SECONDS.observe(elapsed, function=name)
+            recorder.finish(call, status='error')
+            raise
+        except BaseException:
+            # Отмена задачи (ProcessingCancelled), KeyboardInterrupt: запись всё равно
+            # закрываем, иначе трассировка памяти осталась бы включённой до конца процесса
+            elapsed = perf_counter() - start
+            logger.info('%s cancelled after %.4f s', func.__name__, elapsed)
+            CALLS.inc(function=name, status='cancelled')
+            CALL_SECONDS.observe(elapsed, function=name)
+            recorder.finish(call, status='cancelled')
             raise
-    return wrapper
\ No newline at end of file
+        elapsed = perf_counter() - start
+        logger.info('%s finished successfully in %.4f s', func.__name__, elapsed)
+        CALLS.inc(function=name, status='ok')
+        CALL_SECONDS.observe(elapsed, function=name)
+        recorder.finish(call, result)
+        return result
+    return wrapper
@@ -0,0 +1,240 @@
+import bisect
+import sys
+import threading
+import time
+from contextlib import ContextDecorator
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Границы корзин гистограмм по умолчанию (секунды)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+BYTE_BUCKETS = tuple(2 ** power for power in range(20, 36, 2))
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = registry.lock
+        self._values: Dict[Labels, object] = {}
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Labels:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def header(self) -> str:
+        return f'# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n'
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self) -> dict:
+        return dict(self._values)
+
+    def merge(self, values: dict) -> None:
+        for key, value in values.items():
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self) -> str:
+        lines = [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}'
+                 for key, value in sorted(self._values.items())]
+        return self.header() + ''.join(line + '\n' for line in lines)
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def merge(self, values: dict) -> None:
+        # Значения датчиков из других процессов не суммируются
+        pass
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str,
+                 labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def snapshot(self) -> dict:
+        return {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+    def merge(self, values: dict) -> None:
+        for key, (counts, total) in values.items():
+            own, own_total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            self._values[key] = ([a + b for a, b in zip(own, counts)], own_total + total)
+
+    def render(self) -> str:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}')
+            labels = _format_labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return self.header() + ''.join(line + '\n' for line in lines)
+
+
+class MetricsRegistry:
+    """
+    Набор метрик в текстовом формате Prometheus.
+
+    Метрики, накопленные в дочернем процессе пула, переносятся в родительский
+    через drain() (снимок с обнулением) и merge().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        with self.lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+            self._metrics[metric.name] = metric
+
+    def drain(self) -> Dict[str, dict]:
+        """Снимок накопленных значений; сами значения обнуляются"""
+        with self.lock:
+            snapshot = {name: metric.snapshot() for name, metric in self._metrics.items() if metric._values}
+            for metric in self._metrics.values():
+                metric._values.clear()
+            return snapshot
+
+    def merge(self, snapshot: Optional[Dict[str, dict]]) -> None:
+        if not snapshot:
+            return
+        with self.lock:
+            for name, values in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is not None:
+                    metric.merge(values)
+
+    def render(self) -> str:
+        with self.lock:
+            return ''.join(metric.render() for metric in self._metrics.values())
+
+
+REGISTRY = MetricsRegistry()
+
+CALLS = Counter(REGISTRY, 'dpro_calls_total', 'Вызовы функций под декоратором Logger', ['function', 'status'])
+CALL_SECONDS = Histogram(REGISTRY, 'dpro_call_seconds', 'Длительность вызовов под декоратором Logger',
+                         ['function'])
+PROCESSOR_RUNS = Counter(REGISTRY, 'dpro_processor_runs_total', 'Запуски обработчиков', ['processor', 'status'])
+PROCESSOR_SECONDS = Histogram(REGISTRY, 'dpro_processor_seconds', 'Длительность работы обработчиков',
+                              ['processor'])
+PROCESSOR_ROWS = Counter(REGISTRY, 'dpro_processor_rows_total', 'Строк подано на вход обработчиков',
+                         ['processor'])
+PROCESSOR_BYTES = Counter(REGISTRY, 'dpro_processor_bytes_total',
+                          'Байт подано на вход обработчиков (без содержимого строк)', ['processor'])
+JOBS = Counter(REGISTRY, 'dpro_jobs_total', 'Завершённые фоновые задачи', ['kind', 'status'])
+JOB_SECONDS = Histogram(REGISTRY, 'dpro_job_seconds', 'Время выполнения фоновых задач', ['kind'])
+JOB_PEAK_RSS = Histogram(REGISTRY, 'dpro_job_peak_rss_bytes', 'Пиковый RSS процесса пула за время задачи',
+                         ['kind'], buckets=BYTE_BUCKETS)
+QUEUE_DEPTH = Gauge(REGISTRY, 'dpro_job_queue_depth', 'Незавершённые задачи в очереди')
+
+
+class timed(ContextDecorator):
+    """
+    Замер работы обработчика: with timed('Detector'): ... или @timed('Detector').
+    Пишет длительность, число запусков и (если передан rows/nbytes) объём входа.
+    """
+
+    def __init__(self, processor: str, rows: int = 0, nbytes: int = 0):
+        self.processor = processor
+        self.rows = rows
+        self.nbytes = nbytes
+
+    def _recreate_cm(self):
+        # Для декоратора — свой замер на каждый вызов (вызовы могут идти из разных потоков)
+        return type(self)(self.processor, self.rows, self.nbytes)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        PROCESSOR_SECONDS.observe(time.perf_counter() - self._start, processor=self.processor)
+        PROCESSOR_RUNS.inc(processor=self.processor, status='error' if exc_type else 'ok')
+        if self.rows:
+            PROCESSOR_ROWS.inc(self.rows, processor=self.processor)
+        if self.nbytes:
+            PROCESSOR_BYTES.inc(self.nbytes, processor=self.processor)
+        return False
+
+
+def reset_peak_rss() -> bool:
+    """
+    Сбросить пиковый RSS процесса (Linux, /proc/self/clear_refs).
+    Возвращает False, если сброс не поддерживается.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss() -> Optional[int]:
+    """Пиковый RSS процесса в байтах"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss: килобайты в Linux, байты в macOS
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == 'darwin' else usage * 1024
@@ -0,0 +1,165 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+# В процессе одновременно может работать только один cProfile
+_active = threading.Lock()
+
+
+class ProfileResult:
+    """Итог профилирования: пути к файлам и сводка"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.stats_path: Optional[Path] = None
+        self.collapsed_path: Optional[Path] = None
+        self.allocations_path: Optional[Path] = None
+        self.memory_peak_bytes: Optional[int] = None
+        self.top_allocations: List[str] = []
+        self.samples = 0
+
+    def __repr__(self):
+        return (f"ProfileResult({self.name!r}, seconds={self.seconds:.3f}, samples={self.samples}, "
+                f"stats={self.stats_path}, collapsed={self.collapsed_path})")
+
+
+class _StackSampler(threading.Thread):
+    """Раз в interval секунд снимает стек потока и копит свёрнутые стеки"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._halt = threading.Event()
+
+    def run(self) -> None:
+        while not self._halt.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                stack.append(label.replace(';', ':'))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._halt.set()
+        self.join()
+
+
+@contextmanager
+def profile(name: str, output_dir: str = 'profiles', top: int = 20, interval: float = 0.005,
+            memory: bool = True) -> Iterator[ProfileResult]:
+    """
+    Профилировать блок кода.
+
+    Пишет в output_dir:
+    - <name>-<время>.prof — статистика cProfile (pstats, snakeviz);
+    - <name>-<время>.collapsed — свёрнутые стеки для flamegraph.pl / speedscope,
+      снятые отдельным потоком раз в interval секунд;
+    - <name>-<время>.alloc.txt — top мест размещения памяти (tracemalloc)
+      и пик памяти за время блока.
+
+    Если профилирование уже идёт (вложенный вызов), блок выполняется без него.
+    """
+    result = ProfileResult(name)
+    if not _active.acquire(blocking=False):
+        yield result
+        return
+    try:
+        directory = Path(output_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = directory / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+        started_tracing = memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot() if memory and not started_tracing else None
+        if memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+
+        sampler = _StackSampler(threading.get_ident(), interval)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        sampler.start()
+        profiler.enable()
+        try:
+            yield result
+        finally:
+            profiler.disable()
+            sampler.stop()
+            result.seconds = time.perf_counter() - start
+
+            result.stats_path = Path(f"{stem}.prof")
+            profiler.dump_stats(result.stats_path)
+
+            result.collapsed_path = Path(f"{stem}.collapsed")
+            result.samples = sum(sampler.stacks.values())
+            with open(result.collapsed_path, 'w', encoding='utf-8') as f:
+                for stack, count in sampler.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+
+            if memory:
+                result.memory_peak_bytes = tracemalloc.get_traced_memory()[1] - base
+                # Память самого профилировщика в отчёт не включаем
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [tracemalloc.Filter(False, path) for path in (cProfile.__file__, __file__)])
+                if started_tracing:
+                    tracemalloc.stop()
+                stats = snapshot.compare_to(before, 'lineno') if before is not None \
+                    else snapshot.statistics('lineno')
+                result.top_allocations = [str(stat) for stat in stats[:top]]
+                result.allocations_path = Path(f"{stem}.alloc.txt")
+                with open(result.allocations_path, 'w', encoding='utf-8') as f:
+                    f.write(f"Пик памяти за блок: {result.memory_peak_bytes} байт\n")
+                    f.write(f"Top {top} мест размещения (память, оставшаяся после блока):\n")
+                    f.writelines(line + '\n' for line in result.top_allocations)
+    finally:
+        _active.release()
+
+
+class Profilable:
+    """
+    Примесь для обработчиков: после enable_profiling() каждый запуск
+    (методы, обёрнутые profiled) профилируется через profile(),
+    итог лежит в last_profile.
+    """
+    profile_options: Optional[dict] = None
+    last_profile: Optional[ProfileResult] = None
+
+    def enable_profiling(self, output_dir: str = 'profiles', top: int = 20, interval: float = 0.005,
+                         memory: bool = True):
+        self.profile_options = {'output_dir': output_dir, 'top': top, 'interval': interval, 'memory': memory}
+        return self
+
+    def disable_profiling(self):
+        self.profile_options = None
+        return self
+
+
+def profiled(method):
+    """Профилировать вызов метода, если у объекта включено профилирование"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        options = getattr(self, 'profile_options', None)
+        if not options:
+            return method(self, *args, **kwargs)
+        with profile(f"{type(self).__name__}.{method.__name__}", **options) as result:
+            answer = method(self, *args, **kwargs)
+        if result.stats_path is not None:
+            self.last_profile = result
+        return answer
+    return wrapper
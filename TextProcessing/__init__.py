@@ -1,4 +1,11 @@
 from .removing_chars import RemoveHTMLTags, HandleNumbers, RemoveSpecialChars
 from .tokenization import TokenizeText
 from .removing_stopwords import RemoveStopwords
-from .normalizing import NormalizeText
\ No newline at end of file
+from .normalizing import NormalizeText
+from .fused import CleanText
+from .models import models
+from .memo import token_memo
+from .tokens import Tokens, join_tokens
+from .tokenizers import regex_tokenize, get_tokenizer
+from .streaming import iter_documents, iter_batches, process_stream, write_documents
+from .base import shutdown_pools
@@ -1,24 +1,164 @@
+import atexit
+import os
+import threading
 import pandas as pd
 from abc import ABC, abstractmethod
-from typing import Union
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from math import ceil
+from typing import Optional, Union
+from Logger.profiling import Profilable, profiled
 #from Logger import *
-    
-class TextProcessing(ABC):
+
+# Меньше этого числа документов запуск пула дороже самой обработки
+PARALLEL_MIN_ITEMS = 1000
+
+# Экземпляр обработчика в процессе-воркере: создаётся один раз на воркер
+_worker = None
+
+# Сколько пулов держать открытыми: по одному на обработчик с параметрами и числом воркеров
+MAX_POOLS = 4
+_pools: "OrderedDict[tuple, ProcessPoolExecutor]" = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+def _init_worker(cls, params: dict) -> None:
+    global _worker
+    _worker = cls('', **params)
+
+
+def _process_chunk(chunk: list) -> list:
+    return _worker._process_batch(chunk)
+
+
+def _get_pool(cls, params: dict, workers: int) -> ProcessPoolExecutor:
+    """
+    Пул процессов для обработчика cls с params: создаётся при первом запросе
+    и переиспользуется, так что воркеры и загруженные в них модели живут
+    между вызовами run() (например, между пачками process_stream).
+    """
+    key = (cls, tuple(sorted(params.items())), workers)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                     initargs=(cls, params))
+            while len(_pools) > MAX_POOLS:
+                _pools.popitem(last=False)[1].shutdown(wait=False)
+        _pools.move_to_end(key)
+        return pool
+
+
+def _drop_pool(pool: ProcessPoolExecutor) -> None:
+    with _pools_lock:
+        for key, cached in list(_pools.items()):
+            if cached is pool:
+                del _pools[key]
+    pool.shutdown(wait=False)
+
+
+def shutdown_pools() -> None:
+    """Остановить воркеры всех пулов set_n_jobs"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+atexit.register(shutdown_pools)
+if hasattr(os, 'register_at_fork'):
+    # Пулы родителя в дочернем процессе не работают
+    os.register_at_fork(after_in_child=_pools.clear)
+
+
+def chunk_size_for(items: int, workers: int, per_worker: int = 4,
+                   min_size: int = 50, max_size: int = 5000) -> int:
+    """
+    Размер пачки для пула: по per_worker пачек на воркер, чтобы медленные
+    пачки не задерживали остальных, но не меньше min_size документов, чтобы
+    пересылка между процессами не съедала выигрыш.
+    """
+    return max(min_size, min(max_size, ceil(items / (workers * per_worker))))
+
+
+class TextProcessing(Profilable, ABC):
+    # Параллельная обработка Series: см. set_n_jobs
+    n_jobs: int = 1
+    chunk_size: Optional[int] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # enable_profiling() у экземпляра включает профилирование run()
+        if 'run' in cls.__dict__:
+            cls.run = profiled(cls.run)
+
     def __init__(self, text: Union[str, pd.Series]):
         """
         Базовый класс для обработки текста
         """
         self.original_text = text
         self.processed_text = None
-    
+
+    def set_n_jobs(self, n_jobs: int = -1, chunk_size: Optional[int] = None) -> 'TextProcessing':
+        """
+        Обрабатывать Series в n_jobs процессах (-1 — по числу ядер).
+
+        Series режется на пачки по chunk_size документов (по умолчанию
+        подбирается chunk_size_for), в каждом воркере обработчик создаётся
+        один раз с теми же параметрами, результаты собираются в исходном
+        порядке. Пул переиспользуется между вызовами run() с теми же
+        параметрами; остановить воркеры — shutdown_pools().
+
+        Поддерживают обработчики с _process_item (TokenizeText,
+        RemoveStopwords, NormalizeText); остальные и так векторные,
+        для них n_jobs != 1 — ValueError.
+        """
+        if n_jobs != 1 and type(self)._process_item is TextProcessing._process_item:
+            raise ValueError(f"{type(self).__name__} не поддерживает параллельную обработку (set_n_jobs)")
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        return self
+
+    def _worker_params(self) -> dict:
+        """Параметры конструктора, с которыми обработчик создаётся в воркере"""
+        return {}
+
+    def _process_item(self, text: str):
+        """Обработка одного документа Series; переопределяют обработчики с set_n_jobs"""
+        raise NotImplementedError(f"{type(self).__name__} не обрабатывает документы по одному")
+
+    def _process_batch(self, texts: list) -> list:
+        """Обработка пачки документов; переопределяется, если пачкой быстрее, чем по одному"""
+        return [self._process_item(text) for text in texts]
+
+    def _apply(self, series: pd.Series) -> pd.Series:
+        """_process_batch по всей Series, при n_jobs != 1 — пачками в пуле процессов"""
+        workers = (os.cpu_count() or 1) if self.n_jobs in (None, -1) else self.n_jobs
+        values = series.tolist()
+        if workers <= 1 or len(series) < PARALLEL_MIN_ITEMS:
+            return pd.Series(self._process_batch(values), index=series.index, name=series.name, dtype=object)
+
+        size = self.chunk_size or chunk_size_for(len(series), workers)
+        chunks = [values[i:i + size] for i in range(0, len(values), size)]
+        pool = _get_pool(type(self), self._worker_params(), workers)
+        try:
+            results = list(chain.from_iterable(pool.map(_process_chunk, chunks)))
+        except BaseException:
+            # Пул после падения воркера или прерывания не переиспользуем
+            _drop_pool(pool)
+            raise
+        return pd.Series(results, index=series.index, name=series.name, dtype=object)
+
     @abstractmethod
     def run(self) -> Union[str, pd.Series]:
         pass
-    
+
     @abstractmethod
     def info(self) -> str:
         pass
-    
+
     @abstractmethod
     def get_answ(self) -> Union[str, pd.Series]:
-        pass
\ No newline at end of file
+        pass
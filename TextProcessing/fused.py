@@ -0,0 +1,165 @@
+from .base import TextProcessing
+from .removing_chars import (HTML_TAG, SPECIAL_CHARS_ALL, SPECIAL_CHARS_EXCEPT_PUNCTUATION, NUMBERS,
+                             NUMBER_TOKEN)
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import re
+import sys
+from functools import lru_cache
+from typing import Union
+from Logger import *
+
+# Все кодовые точки Unicode, кроме суррогатов (в UTF-8 строках Arrow их не бывает)
+_CODEPOINT_BLOCKS = ((0, 0xD800), (0xE000, sys.maxunicode + 1))
+
+
+@lru_cache(maxsize=None)
+def re2_class(pattern: str) -> str:
+    """
+    Класс символов RE2, совпадающий с односимвольным шаблоном re pattern.
+
+    В RE2 (pyarrow.compute) \\w, \\s и \\d понимаются только как ASCII, а re
+    работает по всему Unicode. Чтобы результат не расходился, множество
+    символов берётся у самого re и перечисляется диапазонами.
+    """
+    runs = re.compile(f'(?:{pattern})+')
+    ranges = []
+    for start, stop in _CODEPOINT_BLOCKS:
+        block = ''.join(map(chr, range(start, stop)))
+        for match in runs.finditer(block):
+            first, last = start + match.start(), start + match.end() - 1
+            ranges.append(f'\\x{{{first:x}}}' if first == last else f'\\x{{{first:x}}}-\\x{{{last:x}}}')
+    return f"[{''.join(ranges)}]"
+
+
+class CleanText(TextProcessing):
+    def __init__(self, text: Union[str, pd.Series, pa.Array, pa.ChunkedArray], remove_html: bool = True,
+                 remove_special: bool = True, keep_punctuation: bool = True, numbers: str = 'keep'):
+        """
+        Очистка текста за один проход: RemoveHTMLTags, RemoveSpecialChars и
+        HandleNumbers, собранные в одно скомпилированное регулярное выражение.
+        Результат совпадает с последовательным запуском шагов в этом порядке.
+
+        Строка чистится шаблоном re. Series и массивы pyarrow чистятся
+        векторно в pyarrow.compute: удаление тегов, спецсимволов и чисел —
+        одним проходом, замена чисел на [NUM] — вторым.
+
+        Параметры:
+        - remove_html: удалять HTML-теги
+        - remove_special, keep_punctuation: как у RemoveSpecialChars
+        - numbers: 'keep', 'remove' или 'replace', как strategy у HandleNumbers
+        """
+        super().__init__(text)
+        if numbers not in ('keep', 'remove', 'replace'):
+            raise ValueError(f"Неизвестная стратегия: {numbers}")
+        self.remove_html = remove_html
+        self.remove_special = remove_special
+        self.keep_punctuation = keep_punctuation
+        self.numbers = numbers
+
+        # Порядок альтернатив важен: тег пробуем раньше одиночного символа '<'
+        self._removable = []
+        if remove_html:
+            self._removable.append(HTML_TAG)
+        if remove_special:
+            self._removable.append(SPECIAL_CHARS_EXCEPT_PUNCTUATION if keep_punctuation else SPECIAL_CHARS_ALL)
+        if numbers == 'remove':
+            self._removable.append(NUMBERS)
+
+        self._merge_numbers = numbers == 'replace' and bool(self._removable)
+        if self._merge_numbers:
+            # Цифры, между которыми удалены только теги и спецсимволы, после
+            # последовательной очистки сливаются в одно число: см. _replace_numbers
+            self.pattern = re.compile('|'.join([f'(?P<num>{NUMBERS.pattern})'] +
+                                               [p.pattern for p in self._removable]))
+            self.repl = None
+        elif numbers == 'replace':
+            self.pattern, self.repl = NUMBERS, NUMBER_TOKEN
+        else:
+            self.pattern = re.compile('|'.join(p.pattern for p in self._removable)) if self._removable else None
+            self.repl = ''
+
+    def _replace_numbers(self, text: str) -> str:
+        # Конец предыдущего совпадения и был ли [NUM] в цепочке совпадений, идущих встык
+        state = [-1, False]
+
+        def repl(match):
+            if match.start() != state[0]:
+                state[1] = False
+            state[0] = match.end()
+            if match.lastgroup != 'num':
+                return ''
+            if state[1]:
+                return ''
+            state[1] = True
+            return NUMBER_TOKEN
+
+        return self.pattern.sub(repl, text)
+
+    def _clean(self, text: str) -> str:
+        if self._merge_numbers:
+            return self._replace_numbers(text)
+        return self.pattern.sub(self.repl, text)
+
+    @staticmethod
+    def _re2_pattern(pattern: re.Pattern) -> str:
+        if pattern is HTML_TAG:
+            return HTML_TAG.pattern
+        if pattern is NUMBERS:
+            return re2_class(r'\d') + '+'
+        return re2_class(pattern.pattern)
+
+    def _clean_arrow(self, array: Union[pa.Array, pa.ChunkedArray]) -> Union[pa.Array, pa.ChunkedArray]:
+        if self._removable:
+            array = pc.replace_substring_regex(
+                array, pattern='|'.join(self._re2_pattern(p) for p in self._removable), replacement='')
+        if self.numbers == 'replace':
+            array = pc.replace_substring_regex(array, pattern=self._re2_pattern(NUMBERS),
+                                               replacement=NUMBER_TOKEN)
+        return array
+
+    def _clean_series(self, series: pd.Series) -> pd.Series:
+        # Как у Series.str: пропуски остаются как есть, прочие не-строки становятся NaN
+        values = series.to_numpy(dtype=object, copy=True)
+        is_str = np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=len(values))
+        if is_str.any():
+            cleaned = self._clean_arrow(pa.array(values[is_str], type=pa.large_string()))
+            values[is_str] = cleaned.to_numpy(zero_copy_only=False)
+        values[~is_str & ~pd.isna(values)] = np.nan
+        return pd.Series(values, index=series.index, name=series.name, dtype=series.dtype)
+
+    @decorator
+    def run(self) -> Union[str, pd.Series, pa.Array, pa.ChunkedArray]:
+        text = self.original_text
+        if self.pattern is None:
+            self.processed_text = text
+        elif isinstance(text, str):
+            self.processed_text = self._clean(text)
+        elif isinstance(text, pd.Series):
+            self.processed_text = self._clean_series(text)
+        elif isinstance(text, (pa.Array, pa.ChunkedArray)):
+            self.processed_text = self._clean_arrow(text)
+        else:
+            raise ValueError("Unsupported input type")
+        return self.processed_text
+
+    @decorator
+    def info(self) -> str:
+        steps = []
+        if self.remove_html:
+            steps.append("HTML-теги")
+        if self.remove_special:
+            steps.append(f"спецсимволы{' (кроме пунктуации)' if self.keep_punctuation else ''}")
+        if self.numbers == 'remove':
+            steps.append("числа")
+        if self.numbers == 'replace':
+            steps.append("числа → [NUM]")
+        return f"Очистка текста за один проход ({', '.join(steps) or 'без изменений'})"
+
+    @decorator
+    def get_answ(self) -> Union[str, pd.Series, pa.Array, pa.ChunkedArray]:
+        if self.processed_text is None:
+            self.run()
+        return self.processed_text
@@ -0,0 +1,55 @@
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
+
+# Сколько разных токенов помнить на пару (язык, метод)
+TOKEN_MEMO_SIZE = 100_000
+
+
+class TokenMemo:
+    """
+    Общий на процесс кэш результатов стемминга и лемматизации по токенам.
+
+    Частоты слов в тексте распределены по Ципфу: небольшой словарь покрывает
+    почти все вхождения, поэтому стеммер и лемматизатор вызываются только на
+    новых токенах. На каждую пару (язык, метод) — свой ограниченный LRU-кэш
+    на maxsize токенов со счётчиками попаданий.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_MEMO_SIZE):
+        self.maxsize = maxsize
+        self._cached: Dict[Tuple[str, str], Callable] = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, lang: str, method: str, func: Callable) -> Callable:
+        """
+        Закэшированная версия func для (lang, method).
+
+        Кэш один на пару: все, кто попросит ту же пару, получат ту же
+        функцию, и func при этом должна давать тот же результат.
+        Аргументы func должны быть хешируемыми.
+        """
+        key = (lang, method)
+        cached = self._cached.get(key)
+        if cached is None:
+            with self._lock:
+                cached = self._cached.setdefault(key, lru_cache(maxsize=self.maxsize)(func))
+        return cached
+
+    def stats(self) -> Dict[Tuple[str, str], Dict]:
+        """Попадания, промахи, размер и доля попаданий по каждой паре (язык, метод)"""
+        result = {}
+        for key, cached in list(self._cached.items()):
+            info = cached.cache_info()
+            calls = info.hits + info.misses
+            result[key] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize,
+                           'maxsize': info.maxsize, 'hit_rate': info.hits / calls if calls else 0.0}
+        return result
+
+    def clear(self) -> None:
+        """Сбросить все кэши (вместе со счётчиками)"""
+        with self._lock:
+            self._cached.clear()
+
+
+token_memo = TokenMemo()
@@ -0,0 +1,115 @@
+import copy
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from natasha import MorphVocab, Segmenter, NewsEmbedding, NewsMorphTagger
+from nltk.corpus import stopwords
+from nltk.stem import PorterStemmer, SnowballStemmer, WordNetLemmatizer
+
+
+class ModelRegistry:
+    """
+    Общий на процесс кэш тяжёлых моделей (natasha, NLTK).
+
+    Каждая модель создаётся один раз при первом get() и дальше отдаётся
+    всем экземплярам и потокам. Загрузка одной и той же модели из двух
+    потоков не дублируется: второй поток ждёт первого. Модели только
+    читаются, поэтому общий экземпляр безопасен для параллельных вызовов.
+    В процессах пула, запущенных через fork, загруженные модели
+    наследуются от родителя без повторной загрузки.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[..., Any]] = {}
+        self._models: Dict[Tuple, Any] = {}
+        self._loading: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[..., Any]) -> None:
+        """Зарегистрировать модель: factory(*args) создаёт её для get(name, *args)"""
+        self._factories[name] = factory
+
+    def get(self, name: str, *args) -> Any:
+        key = (name,) + args
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            lock = self._loading.setdefault(key, threading.Lock())
+        with lock:
+            model = self._models.get(key)
+            if model is None:
+                start = time.perf_counter()
+                model = self._factories[name](*args)
+                self._models[key] = model
+                logging.info('Model %s loaded in %.2f s', key, time.perf_counter() - start)
+        return model
+
+    def is_loaded(self, name: str, *args) -> bool:
+        return (name,) + args in self._models
+
+    def warm_up(self, keys: Optional[Iterable[Tuple]] = None) -> Dict[Tuple, float]:
+        """
+        Загрузить модели заранее, чтобы первый запрос не ждал загрузки.
+
+        keys — ключи вида ('natasha.tagger',) или ('nltk.snowball', 'russian');
+        по умолчанию WARM_UP. Возвращает время загрузки каждой модели, с;
+        модели, которые не удалось загрузить, пропускаются с записью в журнал.
+        """
+        timings = {}
+        for key in (WARM_UP if keys is None else keys):
+            start = time.perf_counter()
+            try:
+                self.get(*key)
+            except Exception as e:
+                logging.error('Model %s warm-up failed: %s', key, e)
+                continue
+            timings[tuple(key)] = time.perf_counter() - start
+        return timings
+
+    def clear(self) -> None:
+        """Выгрузить все модели (освободить память)"""
+        with self._lock:
+            self._models.clear()
+            self._loading.clear()
+
+
+def _with_batch_size(tagger, batch_size: int):
+    """
+    Копия теггера slovnet с другим размером пачки предложений; веса общие с исходным.
+
+    Публичного способа сменить размер пачки у загруженного теггера нет, поэтому
+    меняются поля slovnet (версия закреплена в requirements). Если их нет,
+    возвращается исходный теггер: результат тот же, только пачки по умолчанию.
+    """
+    encoder = getattr(getattr(tagger, 'infer', None), 'encoder', None)
+    if not hasattr(tagger, 'batch_size') or not hasattr(encoder, 'batch_size'):
+        logging.warning('Unexpected slovnet tagger layout, batch size %s is not applied', batch_size)
+        return tagger
+    tagger = copy.copy(tagger)
+    tagger.infer = copy.copy(tagger.infer)
+    tagger.infer.encoder = copy.copy(tagger.infer.encoder)
+    tagger.batch_size = tagger.infer.encoder.batch_size = batch_size
+    return tagger
+
+
+models = ModelRegistry()
+models.register('natasha.segmenter', Segmenter)
+models.register('natasha.embedding', NewsEmbedding)
+models.register('natasha.tagger', lambda: NewsMorphTagger(models.get('natasha.embedding')))
+models.register('natasha.tagger_batch', lambda size: _with_batch_size(models.get('natasha.tagger'), size))
+models.register('natasha.morph_vocab', MorphVocab)
+models.register('nltk.snowball', SnowballStemmer)
+models.register('nltk.porter', PorterStemmer)
+models.register('nltk.wordnet', WordNetLemmatizer)
+models.register('nltk.stopwords', lambda lang: frozenset(stopwords.words(lang)))
+
+# Что загружать по умолчанию в warm_up(): самое долгое — модели natasha
+WARM_UP = [
+    ('natasha.segmenter',),
+    ('natasha.tagger',),
+    ('natasha.morph_vocab',),
+    ('nltk.snowball', 'russian'),
+    ('nltk.snowball', 'english'),
+]
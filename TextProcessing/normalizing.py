@@ -1,79 +1,181 @@
 from .base import TextProcessing
-from nltk.tokenize import word_tokenize
-from nltk.stem import SnowballStemmer, WordNetLemmatizer
 from nltk import download
 from typing import Union
 import pandas as pd
 import logging
-from natasha import MorphVocab, Segmenter, NewsEmbedding, NewsMorphTagger
+from .models import models
+from .memo import token_memo
+from .tokens import Tokens
+from .tokenizers import get_tokenizer
+
+# Размер пачки предложений для теггера natasha в пакетном режиме
+TAGGER_BATCH_SIZE = 64
+
+
+def _natasha_lemma(word: str, pos, feats):
+    # feats приходит кортежем пар, чтобы ключ кэша был хешируемым
+    return models.get('natasha.morph_vocab').lemmatize(word, pos, None if feats is None else dict(feats))
 
 
 class NormalizeText(TextProcessing):
-    def __init__(self, text: Union[str, pd.Series], method: str = 'stem', lang: str = 'russian'):
+    def __init__(self, text: Union[str, pd.Series], method: str = 'stem', lang: str = 'russian',
+                 batch_size: int = 1000, tokenizer: str = 'nltk'):
+        """
+        Параметры:
+        - method: 'stem' или 'lemmatize'
+        - lang: 'russian' или 'english'
+        - batch_size: для лемматизации русской Series — сколько документов
+            размечать natasha за один вызов (1 — по одному документу)
+        - tokenizer: 'nltk' (word_tokenize) или 'regex' (быстрый regex_tokenize);
+            для стемминга и английской лемматизации, natasha сегментирует текст сама
+        """
         super().__init__(text)
         self.method = method
         self.lang = lang
+        self.batch_size = batch_size
+        self.tokenizer = tokenizer
+        self.tokenize = get_tokenizer(tokenizer)
         
-        # Инициализация процессоров
+        # Модели общие на процесс и загружаются один раз (см. models.warm_up)
         if lang == 'russian':
             if method == 'lemmatize':
-                self.segmenter = Segmenter()
-                self.emb = NewsEmbedding()
-                self.morph_tagger = NewsMorphTagger(self.emb)
-                self.morph_vocab = MorphVocab()
+                self.segmenter = models.get('natasha.segmenter')
+                self.emb = models.get('natasha.embedding')
+                self.morph_tagger = models.get('natasha.tagger')
+                self.morph_vocab = models.get('natasha.morph_vocab')
+                self._lemma = token_memo.wrap(lang, method, _natasha_lemma)
             else:  # stem
-                self.stemmer = SnowballStemmer('russian')
+                self.stemmer = models.get('nltk.snowball', 'russian')
         else:  # english
             if method == 'lemmatize':
-                self.lemmatizer = WordNetLemmatizer()
+                self.lemmatizer = models.get('nltk.wordnet')
             else:  # stem
-                self.stemmer = SnowballStemmer('english')
+                self.stemmer = models.get('nltk.snowball', 'english')
+        # Результат по токену кэшируется в token_memo: слова повторяются по Ципфу
+        if method == 'stem':
+            self._normalize_token = token_memo.wrap(lang, method, self.stemmer.stem)
+        elif lang != 'russian':
+            self._normalize_token = token_memo.wrap(lang, method, self.lemmatizer.lemmatize)
+
+    def _lemmatize_token(self, word: str, pos, feats):
+        return self._lemma(word, pos, None if feats is None else tuple(feats.items()))
+
+    def _tokens(self, text: Union[str, Tokens], lang: str) -> list:
+        """Токены в нижнем регистре: готовые Tokens не токенизируются повторно"""
+        if isinstance(text, Tokens):
+            return [token.lower() for token in text]
+        return self.tokenize(text.lower(), language=lang)
 
-    def _process_russian(self, text: str) -> str:
+    @staticmethod
+    def _output(text: Union[str, Tokens], tokens) -> Union[str, Tokens]:
+        """Tokens на входе — Tokens на выходе, иначе строка"""
+        return Tokens(tokens) if isinstance(text, Tokens) else ' '.join(tokens)
+
+    def _process_russian(self, text: Union[str, Tokens]) -> Union[str, Tokens]:
         """Обработка русского текста"""
         try:
             if self.method == 'stem':
-                tokens = word_tokenize(text.lower(), language='russian')
-                return ' '.join(self.stemmer.stem(word) for word in tokens)
+                return self._output(text, map(self._normalize_token, self._tokens(text, 'russian')))
+            elif isinstance(text, Tokens):
+                return self._lemmatize_russian_batch([text])[0]
             else:  # lemmatize
                 from natasha import Doc
                 doc = Doc(text)
                 doc.segment(self.segmenter)
                 doc.tag_morph(self.morph_tagger)
                 
-                for token in doc.tokens:
-                    token.lemmatize(self.morph_vocab)
-                
-                tokens = [token.lemma for token in doc.tokens if token.lemma is not None]
-                return ' '.join(tokens)
+                lemmas = (self._lemmatize_token(token.text, token.pos, token.feats) for token in doc.tokens)
+                return ' '.join(lemma for lemma in lemmas if lemma is not None)
         except Exception as e:
             logging.error(f"Russian processing error: {str(e)}", exc_info=True)
             return text
 
-    def _process_english(self, text: str) -> str:
+    def _process_english(self, text: Union[str, Tokens]) -> Union[str, Tokens]:
         """Обработка английского текста"""
         try:
-            tokens = word_tokenize(text.lower(), language='english')
-            if self.method == 'stem':
-                return ' '.join(self.stemmer.stem(word) for word in tokens)
-            else:  # lemmatize
-                return ' '.join(self.lemmatizer.lemmatize(word) for word in tokens)
+            return self._output(text, map(self._normalize_token, self._tokens(text, 'english')))
         except Exception as e:
             logging.error(f"English processing error: {str(e)}")
             return text
 
+    def _lemmatize_russian_batch(self, texts: list) -> list:
+        """
+        Лемматизация пачки русских документов: предложения всех документов
+        размечаются теггером вместе, пачками по TAGGER_BATCH_SIZE, отсортированные
+        по длине, чтобы короткие тексты не добивались до длины самого длинного.
+        Результат совпадает с _process_russian по каждому документу.
+        Документы-Tokens не сегментируются: предложения берутся из Tokens.sentences().
+        """
+        from natasha.span import envelop_spans
+        tagger = models.get('natasha.tagger_batch', TAGGER_BATCH_SIZE)
+
+        docs, sentences, owners = [], [], []
+        for text in texts:
+            if isinstance(text, Tokens):
+                words, groups, start = list(text), [], 0
+                for sentence in text.sentences():
+                    groups.append(range(start, start + len(sentence)))
+                    start += len(sentence)
+            else:
+                tokens = list(self.segmenter.tokenize(text))
+                words = [token.text for token in tokens]
+                positions = {id(token): i for i, token in enumerate(tokens)}
+                groups = [[positions[id(token)] for token in group]
+                          for group in envelop_spans(tokens, self.segmenter.sentenize(text)) if group]
+            for group in groups:
+                sentences.append([words[i] for i in group])
+                owners.append((len(docs), group))
+            docs.append((text, words, [(None, None)] * len(words)))
+
+        order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]))
+        for i, markup in zip(order, tagger.map([sentences[i] for i in order])):
+            doc, positions = owners[i]
+            tags = docs[doc][2]
+            for position, token in zip(positions, markup.tokens):
+                tags[position] = (token.pos, token.feats)
+
+        results = []
+        for text, words, tags in docs:
+            lemmas = (self._lemmatize_token(word, pos, feats) for word, (pos, feats) in zip(words, tags))
+            results.append(self._output(text, [lemma for lemma in lemmas if lemma is not None]))
+        return results
+
+    def _process_batch(self, texts: list) -> list:
+        if self.lang != 'russian' or self.method != 'lemmatize' or self.batch_size <= 1:
+            return super()._process_batch(texts)
+
+        results = list(texts)
+        # Пропуски и прочие не-тексты пропускаются, как и при обработке по одному
+        todo = [i for i, text in enumerate(texts) if isinstance(text, (str, Tokens))]
+        for start in range(0, len(todo), self.batch_size):
+            pack = todo[start:start + self.batch_size]
+            try:
+                done = self._lemmatize_russian_batch([texts[i] for i in pack])
+            except Exception as e:
+                logging.error(f"Russian batch processing error: {str(e)}")
+                done = [self._process_russian(texts[i]) for i in pack]
+            for i, text in zip(pack, done):
+                results[i] = text
+        return results
+
+    def _worker_params(self) -> dict:
+        return {'method': self.method, 'lang': self.lang, 'batch_size': self.batch_size,
+                'tokenizer': self.tokenizer}
+
+    def _process_item(self, text: str) -> str:
+        if self.lang == 'russian':
+            return self._process_russian(text)
+        return self._process_english(text)
+
     def run(self) -> Union[str, pd.Series]:
         try:
-            if isinstance(self.original_text, str):
+            if isinstance(self.original_text, (str, Tokens)):
                 if self.lang == 'russian':
                     self.processed_text = self._process_russian(self.original_text)
                 else:
                     self.processed_text = self._process_english(self.original_text)
             elif isinstance(self.original_text, pd.Series):
-                if self.lang == 'russian':
-                    self.processed_text = self.original_text.apply(self._process_russian)
-                else:
-                    self.processed_text = self.original_text.apply(self._process_english)
+                self.processed_text = self._apply(self.original_text)
             else:
                 raise ValueError("Unsupported input type")
             return self.processed_text
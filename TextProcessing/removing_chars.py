@@ -4,6 +4,13 @@ import re
 from typing import Union
 from Logger import *
 
+# Шаблоны компилируются один раз на модуль; их же собирает в один проход CleanText
+HTML_TAG = re.compile(r'<[^>]+>')
+SPECIAL_CHARS_ALL = re.compile(r'[^\w\s]')
+SPECIAL_CHARS_EXCEPT_PUNCTUATION = re.compile(r'[^\w\s.,!?]')
+NUMBERS = re.compile(r'\d+')
+NUMBER_TOKEN = '[NUM]'
+
 class RemoveHTMLTags(TextProcessing):
     def __init__(self, text: Union[str, pd.Series]):
         super().__init__(text)
@@ -11,9 +18,9 @@ class RemoveHTMLTags(TextProcessing):
     @decorator
     def run(self) -> Union[str, pd.Series]:
         if isinstance(self.original_text, str):
-            self.processed_text = re.sub(r'<[^>]+>', '', self.original_text)
+            self.processed_text = HTML_TAG.sub('', self.original_text)
         else:
-            self.processed_text = self.original_text.str.replace(r'<[^>]+>', '', regex=True)
+            self.processed_text = self.original_text.str.replace(HTML_TAG, '', regex=True)
         return self.processed_text
     
     @decorator
@@ -33,9 +40,9 @@ class RemoveSpecialChars(TextProcessing):
     
     @decorator
     def run(self) -> Union[str, pd.Series]:
-        pattern = r'[^\w\s]' if self.keep_punctuation else r'[^\w\s.,!?]'
+        pattern = SPECIAL_CHARS_EXCEPT_PUNCTUATION if self.keep_punctuation else SPECIAL_CHARS_ALL
         if isinstance(self.original_text, str):
-            self.processed_text = re.sub(pattern, '', self.original_text)
+            self.processed_text = pattern.sub('', self.original_text)
         else:
             self.processed_text = self.original_text.str.replace(pattern, '', regex=True)
         return self.processed_text
@@ -65,14 +72,14 @@ class HandleNumbers(TextProcessing):
             self.processed_text = self.original_text
         elif self.strategy == 'remove':
             if isinstance(self.original_text, str):
-                self.processed_text = re.sub(r'\d+', '', self.original_text)
+                self.processed_text = NUMBERS.sub('', self.original_text)
             else:
-                self.processed_text = self.original_text.str.replace(r'\d+', '', regex=True)
+                self.processed_text = self.original_text.str.replace(NUMBERS, '', regex=True)
         elif self.strategy == 'replace':
             if isinstance(self.original_text, str):
-                self.processed_text = re.sub(r'\d+', '[NUM]', self.original_text)
+                self.processed_text = NUMBERS.sub(NUMBER_TOKEN, self.original_text)
             else:
-                self.processed_text = self.original_text.str.replace(r'\d+', '[NUM]', regex=True)
+                self.processed_text = self.original_text.str.replace(NUMBERS, NUMBER_TOKEN, regex=True)
         else:
             raise ValueError(f"Неизвестная стратегия: {self.strategy}")
         return self.processed_text
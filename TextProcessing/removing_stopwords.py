@@ -1,48 +1,99 @@
 from .base import TextProcessing
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
 from nltk import download
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from typing import Union
 import logging
+from .models import models
+from .tokens import Tokens
+from .tokenizers import get_tokenizer
+from .fused import re2_class
 
 # Скачиваем необходимые ресурсы NLTK
 download('stopwords', quiet=True)
 download('punkt', quiet=True)
 
 class RemoveStopwords(TextProcessing):
-    def __init__(self, text: Union[str, pd.Series], lang: str = 'russian'):
+    def __init__(self, text: Union[str, pd.Series], lang: str = 'russian', tokenizer: str = 'nltk'):
         """
         Инициализация обработчика стоп-слов
-        :param text: Входной текст (строка или pandas.Series)
+        :param text: Входной текст (строка, Tokens или pandas.Series из них);
+            Tokens не токенизируются повторно, результат для них — тоже Tokens
         :param lang: Язык текста ('russian' или 'english')
+        :param tokenizer: 'nltk' (word_tokenize), 'regex' (быстрый regex_tokenize) или
+            'simple' (слова и отдельные знаки): Series с ним обрабатывается векторно в pyarrow
         """
         super().__init__(text)
         self.lang = lang
+        self.tokenizer = tokenizer
+        self.tokenize = get_tokenizer(tokenizer)
         self.stop_words = self._load_stopwords()
         
-    def _load_stopwords(self) -> set:
-        """Загрузка стоп-слов для указанного языка"""
+    def _load_stopwords(self) -> frozenset:
+        """Загрузка стоп-слов для указанного языка (один раз на процесс)"""
         try:
-            return set(stopwords.words(self.lang))
+            return models.get('nltk.stopwords', self.lang)
         except Exception as e:
             logging.error(f"Error loading stopwords for {self.lang}: {str(e)}")
-            return set()
+            return frozenset()
 
-    def _process_text(self, text: str) -> str:
+    def _process_text(self, text: Union[str, Tokens]) -> Union[str, Tokens]:
         """Обработка одного текстового фрагмента (без стемминга!)"""
-        tokens = word_tokenize(text.lower())
+        if isinstance(text, Tokens):
+            tokens = [token.lower() for token in text]
+        else:
+            tokens = self.tokenize(text.lower())
         # Только фильтрация стоп-слов, без изменения самих слов
         filtered_words = [word for word in tokens if word not in self.stop_words]
-        return ' '.join(filtered_words)
+        return Tokens(filtered_words) if isinstance(text, Tokens) else ' '.join(filtered_words)
+
+    def _remove_arrow(self, array: pa.Array) -> pa.Array:
+        """
+        Удаление стоп-слов без цикла по токенам: нижний регистр, разбиение
+        как у simple_tokenize (знаки отделяются пробелами, затем split по
+        пробелам), маска стоп-слов по is_in и склейка оставшихся токенов.
+        """
+        spaced = pc.replace_substring_regex(pc.utf8_lower(array), pattern=re2_class(r'[^\w\s]'),
+                                            replacement=' \\0 ')
+        tokens = pc.utf8_split_whitespace(spaced)
+        words = pc.list_flatten(tokens)
+        # Пустые строки split оставляет на краях текста: отбрасываем их вместе со стоп-словами
+        dropped = pa.array(sorted(self.stop_words | {''}), type=words.type)
+        keep = pc.invert(pc.is_in(words, value_set=dropped))
+        rows = pc.list_parent_indices(tokens).filter(keep).to_numpy()
+        offsets = np.zeros(len(array) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(array)), out=offsets[1:])
+        lists = pa.LargeListArray.from_arrays(pa.array(offsets), words.filter(keep))
+        return pc.binary_join(lists, pa.scalar(' ', words.type))
+
+    def _remove_series(self, series: pd.Series) -> pd.Series:
+        # Пропуски остаются пропусками; Series с Tokens и другими объектами идёт через _apply
+        values = series.to_numpy(dtype=object, copy=True)
+        is_str = np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=len(values))
+        if (~is_str & ~pd.isna(values)).any():
+            return self._apply(series)
+        if is_str.any():
+            cleaned = self._remove_arrow(pa.array(values[is_str], type=pa.large_string()))
+            values[is_str] = cleaned.to_numpy(zero_copy_only=False)
+        return pd.Series(values, index=series.index, name=series.name, dtype=object)
+
+    def _worker_params(self) -> dict:
+        return {'lang': self.lang, 'tokenizer': self.tokenizer}
+
+    def _process_item(self, text: str) -> str:
+        return self._process_text(text)
 
     def run(self) -> Union[str, pd.Series]:
         """Основной метод обработки текста"""
         try:
-            if isinstance(self.original_text, str):
+            if isinstance(self.original_text, (str, Tokens)):
                 self.processed_text = self._process_text(self.original_text)
+            elif isinstance(self.original_text, pd.Series) and self.tokenizer == 'simple':
+                self.processed_text = self._remove_series(self.original_text)
             elif isinstance(self.original_text, pd.Series):
-                self.processed_text = self.original_text.apply(self._process_text)
+                self.processed_text = self._apply(self.original_text)
             else:
                 raise ValueError("Unsupported input type")
             return self.processed_text
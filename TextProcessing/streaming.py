@@ -0,0 +1,161 @@
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+import pandas as pd
+from .tokens import join_tokens
+
+# Сколько документов обрабатывать за раз: память ограничена одной пачкой
+STREAM_BATCH_SIZE = 10000
+# Размер блока при чтении JSON-массива
+_JSON_READ_SIZE = 1 << 16
+
+
+def iter_documents(path: Union[str, Path], column: Optional[str] = None, field: str = 'text',
+                   encoding: str = 'utf-8', chunk_size: int = STREAM_BATCH_SIZE) -> Iterator[str]:
+    """
+    Документы из файла по одному, без чтения файла целиком.
+
+    Параметры:
+    - path: .txt (документ — строка), .csv (документ — значение колонки),
+        .jsonl (документ — строка JSON) или .json (массив документов)
+    - column: колонка CSV (по умолчанию первая)
+    - field: поле объекта в JSON/JSONL (если документ — объект)
+    - chunk_size: сколько строк CSV читать за раз
+    Пустые строки и пропуски пропускаются.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Файл {path} не найден")
+
+    suffix = path.suffix.lower()
+    if suffix == '.txt':
+        with open(path, 'r', encoding=encoding) as f:
+            for line in f:
+                line = line.rstrip('\r\n')
+                if line:
+                    yield line
+    elif suffix == '.csv':
+        usecols = [column] if column is not None else [0]
+        for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunk_size, encoding=encoding):
+            yield from chunk.iloc[:, 0].dropna().astype(str)
+    elif suffix == '.jsonl':
+        with open(path, 'r', encoding=encoding) as f:
+            for line in f:
+                if line.strip():
+                    document = _document(json.loads(line), field)
+                    if document:
+                        yield document
+    elif suffix == '.json':
+        with open(path, 'r', encoding=encoding) as f:
+            for item in _iter_json_array(f):
+                document = _document(item, field)
+                if document:
+                    yield document
+    else:
+        raise ValueError(f"Неподдерживаемый формат файла: {path.suffix}")
+
+
+def _document(item, field: str) -> Optional[str]:
+    if isinstance(item, dict):
+        item = item.get(field)
+    return None if item is None else str(item)
+
+
+def _iter_json_array(f) -> Iterator:
+    """Элементы JSON-массива верхнего уровня по одному; объект верхнего уровня — его значения"""
+    decoder = json.JSONDecoder()
+    # Читаем до первого непробельного символа, сколько бы пробелов ни было в начале
+    buffer, eof = '', False
+    while not buffer and not eof:
+        chunk = f.read(_JSON_READ_SIZE)
+        eof = not chunk
+        buffer = chunk.lstrip()
+    if not buffer.startswith('['):
+        data = decoder.decode(buffer + f.read())
+        yield from (data.values() if isinstance(data, dict) else [data])
+        return
+
+    position = 1
+    while True:
+        # Пропускаем пробелы и запятые между элементами
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+        else:
+            # Элемент закончен, только если за ним идёт ',' или ']': число
+            # на краю блока (3.|14) читается без ошибки, но не полностью
+            after = end
+            while after < len(buffer) and buffer[after] in ' \t\r\n':
+                after += 1
+            if after < len(buffer) and buffer[after] in ',]':
+                yield item
+                position = after
+                continue
+            if eof:
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, after)
+        # Элемент не поместился в буфер: дочитываем следующий блок
+        chunk = f.read(_JSON_READ_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_batches(documents: Iterable, size: int = STREAM_BATCH_SIZE) -> Iterator[List]:
+    """Разбить поток документов на списки по size"""
+    documents = iter(documents)
+    while True:
+        batch = list(islice(documents, size))
+        if not batch:
+            return
+        yield batch
+
+
+def process_stream(documents: Iterable[str], *steps: Callable[[pd.Series], pd.Series],
+                   batch_size: int = STREAM_BATCH_SIZE,
+                   progress: Optional[Callable[[int], None]] = None) -> Iterator:
+    """
+    Прогнать поток документов через шаги обработки пачками по batch_size.
+
+    Каждый шаг получает pd.Series пачки и возвращает результат, например
+    lambda s: CleanText(s).run(). Документы отдаются по одному в исходном
+    порядке, Tokens собираются в строки. В памяти — только текущая пачка.
+    progress после каждой пачки получает число обработанных документов.
+    """
+    done = 0
+    for batch in iter_batches(documents, batch_size):
+        result = pd.Series(batch, dtype=object)
+        for step in steps:
+            result = step(result)
+        yield from join_tokens(result)
+        done += len(batch)
+        if progress is not None:
+            progress(done)
+
+
+def write_documents(documents: Iterable, path: Union[str, Path], encoding: str = 'utf-8') -> int:
+    """
+    Записывать документы в файл по мере поступления: .jsonl — строка JSON
+    на документ, иначе — текст на строку (переводы строк внутри документа
+    заменяются пробелами). Возвращает число записанных документов.
+    """
+    path = Path(path)
+    as_json = path.suffix.lower() == '.jsonl'
+    count = 0
+    with open(path, 'w', encoding=encoding) as f:
+        for document in documents:
+            if as_json:
+                f.write(json.dumps(document, ensure_ascii=False, default=str))
+            else:
+                if isinstance(document, list):
+                    document = ' '.join(map(str, document))
+                f.write(' '.join(str(document).splitlines()))
+            f.write('\n')
+            count += 1
+    return count
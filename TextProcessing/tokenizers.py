@@ -0,0 +1,109 @@
+import re
+from typing import Callable, List
+from nltk.tokenize import word_tokenize
+
+# Символы, которые word_tokenize (NLTKWordTokenizer) всегда отделяет от слова
+_SPLIT = r"""«“‘„`»”’;@#$%&‒-―?!*()\[\]{}<>"""
+# Закрывающие скобки и кавычки, которые могут стоять после точки в конце предложения
+_CLOSERS = r"""\]\)}>"'»”’"""
+# Точка в конце предложения: дальше только закрывающие символы и пробел или конец текста.
+# После числа или одной буквы (инициалы, «т. е.») перед строчной буквой — как у Punkt, не конец
+_FINAL_PERIOD = (rf"\.(?=[{_CLOSERS}]*(?:\s|$))"
+                 rf"(?:(?<!\b\w\.)(?<!\d\.)|(?![{_CLOSERS}]*\s+[a-zа-яё]))")
+
+WORD_TOKEN = re.compile(rf"""
+      \.{{2,}} | -- | ``                          # многоточие, двойное тире, `` как кавычка
+    | [{_SPLIT}"]                                 # отделяемые символы и кавычки
+    | [,:](?!\d)                                  # запятая и двоеточие, кроме 1,5 и 10:30
+    | {_FINAL_PERIOD}
+    | (?:[^\s{_SPLIT}".,:'-]                      # слово: всё остальное до пробела
+        | [,:](?=\d) | (?!{_FINAL_PERIOD})\.(?!\.)
+        | -(?!-) | (?<=\w)'(?=\w) | '(?i:re|ve|ll|m|t|s|d|n)\b)+
+    | '
+""", re.VERBOSE)
+
+# Английские клитики, которые word_tokenize отделяет: do|n't, it|'s, we|'ll
+_CLITIC = re.compile(r"(?i)^(.+?)(n't|'s|'m|'d|'ll|'re|'ve)$")
+# cannot word_tokenize делит на can|not в любом языке
+_CANNOT = re.compile(r"(?i)^(can)(not)$")
+
+
+def regex_tokenize(text: str, language: str = 'english') -> List[str]:
+    """
+    Быстрая токенизация по словам одним скомпилированным регулярным выражением.
+
+    Повторяет основные правила word_tokenize (NLTK): пунктуация и скобки
+    отделяются, дефисы, числа вида 1,5 и внутренние точки остаются в слове,
+    точка в конце предложения отделяется, двойные кавычки становятся `` и '',
+    в английском отделяются клитики (n't, 's, 'll...), cannot делится на can not.
+    Расхождения с NLTK — в основном на сокращениях с точкой, которые знает
+    только Punkt.
+    """
+    # Кавычки зависят от позиции в тексте, поэтому для них — finditer, иначе быстрее findall
+    tokens = _convert_quotes(text) if '"' in text else WORD_TOKEN.findall(text)
+    if language == 'english' and "'" in text:
+        tokens = [part for token in tokens for part in _split_clitic(token)]
+    if 'annot' in text or 'ANNOT' in text:
+        tokens = [part for token in tokens for part in _split_cannot(token)]
+    return tokens
+
+
+def _convert_quotes(text: str) -> List[str]:
+    # Как в NLTK: открывающая кавычка — ``, закрывающая — ''
+    tokens = []
+    for match in WORD_TOKEN.finditer(text):
+        token = match.group()
+        if token == '"':
+            token = '``' if _opens(text, match.start()) else "''"
+        tokens.append(token)
+    return tokens
+
+
+def _opens(text: str, start: int) -> bool:
+    # NLTK открывает кавычку в начале предложения и после пробела или скобки;
+    # после переноса строки внутри предложения кавычка считается закрывающей
+    if start == 0 or text[start - 1] in ' ([{<':
+        return True
+    if text[start - 1] not in '\t\n\r':
+        return False
+    start -= 1
+    while start >= 0 and text[start].isspace():
+        start -= 1
+    return start < 0 or text[start] in '.!?'
+
+
+def _split_cannot(token: str) -> List[str]:
+    match = _CANNOT.match(token) if len(token) == 6 else None
+    return list(match.groups()) if match else [token]
+
+
+def _split_clitic(token: str) -> List[str]:
+    match = _CLITIC.match(token) if "'" in token else None
+    return list(match.groups()) if match else [token]
+
+
+# Слово из букв и цифр или любой другой непробельный символ отдельно
+SIMPLE_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def simple_tokenize(text: str, language: str = 'english') -> List[str]:
+    """
+    Простейшая токенизация: слова (\\w+) и каждый знак отдельно, без правил NLTK.
+    Её же повторяют векторные пути по Series в pyarrow (RemoveStopwords).
+    """
+    return SIMPLE_TOKEN.findall(text)
+
+
+TOKENIZERS = {
+    'nltk': word_tokenize,
+    'regex': regex_tokenize,
+    'simple': simple_tokenize,
+}
+
+
+def get_tokenizer(name: str) -> Callable[..., List[str]]:
+    """Токенизатор по словам: 'nltk' (word_tokenize), 'regex' (regex_tokenize) или 'simple' (simple_tokenize)"""
+    try:
+        return TOKENIZERS[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный токенизатор: {name}") from None
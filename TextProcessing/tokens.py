@@ -0,0 +1,40 @@
+import pandas as pd
+from typing import Union
+
+# Токены, после которых natasha начинает новое предложение
+SENTENCE_END = frozenset({'.', '!', '?', '…', '...'})
+
+
+class Tokens(list):
+    """
+    Токены документа, которые передаются между шагами конвейера.
+
+    TokenizeText(token_type='word') отдаёт Tokens, а RemoveStopwords и
+    NormalizeText, получив Tokens, работают с ними напрямую и возвращают
+    Tokens: цепочка токенизирует документ один раз и собирает строку
+    только в конце (str(tokens) или join_tokens). Это обычный список,
+    поэтому код, ждавший от TokenizeText список, работает как прежде.
+    """
+
+    def __str__(self) -> str:
+        return ' '.join(self)
+
+    def sentences(self) -> list:
+        """Разбить токены на предложения по концевой пунктуации"""
+        result, start = [], 0
+        for i, token in enumerate(self):
+            if token in SENTENCE_END:
+                result.append(self[start:i + 1])
+                start = i + 1
+        if start < len(self):
+            result.append(self[start:])
+        return result
+
+
+def join_tokens(text: Union[str, Tokens, pd.Series]) -> Union[str, pd.Series]:
+    """Собрать Tokens обратно в строки (в Series — поэлементно), остальное вернуть как есть"""
+    if isinstance(text, Tokens):
+        return str(text)
+    if isinstance(text, pd.Series):
+        return text.map(lambda value: str(value) if isinstance(value, Tokens) else value)
+    return text
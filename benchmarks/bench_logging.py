@@ -0,0 +1,95 @@
+"""
+Накладные расходы декоратора Logger на один вызов.
+
+Сравнивает пустую функцию без декоратора, прежнюю схему (синхронный
+FileHandler, две строки на вызов) и текущий декоратор с очередью записи —
+без выборки записей о вызовах и с записью каждого вызова.
+
+    python benchmarks/bench_logging.py --calls 100000 --json logging.json
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from functools import wraps
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from Logger import decorator, configure_logging, stop_logging  # noqa: E402
+from Logger.calls import recorder  # noqa: E402
+
+
+def legacy_decorator(log: logging.Logger):
+    """Декоратор в прежнем виде: f-строки и запись в файл в вызывающем потоке"""
+    def wrap(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            log.info(f'{func.__name__} started')
+            try:
+                result = func(*args, **kwargs)
+                log.info(f'{func.__name__} finished successfully')
+                return result
+            except Exception as e:
+                log.error(f'Error in {func.__name__}: {str(e)}')
+                raise
+        return wrapper
+    return wrap
+
+
+def measure(func, calls: int, repeats: int) -> float:
+    """Лучшее из repeats время одного вызова, микросекунды"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=50000, help='вызовов в одном замере')
+    parser.add_argument('--repeats', type=int, default=3, help='число замеров')
+    parser.add_argument('--json', help='сохранить результат в JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_logging(Path(tmp) / 'queued.log')
+        recorder.configure(path=str(Path(tmp) / 'calls.jsonl'))
+
+        legacy_log = logging.getLogger('bench.legacy')
+        legacy_log.propagate = False
+        legacy_log.setLevel(logging.INFO)
+        file_handler = logging.FileHandler(Path(tmp) / 'legacy.log')
+        file_handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        legacy_log.addHandler(file_handler)
+
+        def bare():
+            return 1
+
+        legacy = legacy_decorator(legacy_log)(bare)
+        queued = decorator(bare)
+
+        results = {'bare': measure(bare, args.calls, args.repeats),
+                   'legacy_sync_file': measure(legacy, args.calls, args.repeats)}
+        recorder.configure(sample_rate=0.0)
+        results['queued'] = measure(queued, args.calls, args.repeats)
+        recorder.configure(sample_rate=1.0)
+        results['queued_trace_all'] = measure(queued, args.calls // 10 or 1, args.repeats)
+
+        file_handler.close()
+        stop_logging()
+        recorder.close()
+
+    for name, value in results.items():
+        print(f'{name:<20} {value:8.2f} мкс/вызов')
+    if args.json:
+        Path(args.json).write_text(json.dumps({'calls': args.calls, 'us_per_call': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Бенчмарк обработчиков DataProcessing на синтетических данных.
+
+    python benchmarks/bench_processing.py --rows 1000 10000 --output before.json
+    python benchmarks/bench_processing.py --rows 10000 --cases Outliers --memory
+    python benchmarks/compare.py before.json after.json
+
+Таблицы строит benchmarks/datagen.py (доли пропусков, дубликатов и выбросов
+задаются флагами). В JSON: environment (версии Python и пакетов, коммит,
+время), params (флаги прогона) и results — по записи на случай и размер:
+case, rows, cols, seconds_min, seconds_median, repeats и с --memory
+peak_bytes, либо error, если обработчик упал.
+"""
+import argparse
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.common import describe_error, environment, measure, save  # noqa: E402
+from benchmarks.datagen import make_frame  # noqa: E402
+from DataProcessing import (AutoAnal, CleanData, DetectAndRemoveOutliers, HandleMissingValues,  # noqa: E402
+                            NormalizeData, StandardizeData)
+from Logger.calls import recorder  # noqa: E402
+
+
+def _constant_fill(df):
+    return {col: 0 for col in df.select_dtypes(include='number').columns}
+
+
+# Имя случая -> фабрика обработчика по DataFrame
+CASES = {
+    'CleanData': lambda df: CleanData(df),
+    'HandleMissingValues[knn]': lambda df: HandleMissingValues(df, numeric_strategy='knn'),
+    'HandleMissingValues[iterative]': lambda df: HandleMissingValues(df, numeric_strategy='iterative'),
+    'HandleMissingValues[mean]': lambda df: HandleMissingValues(df, numeric_strategy='mean'),
+    'HandleMissingValues[median]': lambda df: HandleMissingValues(df, numeric_strategy='median'),
+    'HandleMissingValues[constant]': lambda df: HandleMissingValues(
+        df, numeric_strategy='constant', categorical_strategy='constant', fill_value=_constant_fill(df)),
+    'DetectAndRemoveOutliers[IQR]': lambda df: DetectAndRemoveOutliers(df, method='IQR'),
+    'DetectAndRemoveOutliers[zscore]': lambda df: DetectAndRemoveOutliers(df, method='zscore'),
+    'DetectAndRemoveOutliers[isolation_forest]': lambda df: DetectAndRemoveOutliers(df, method='isolation_forest'),
+    'DetectAndRemoveOutliers[lof]': lambda df: DetectAndRemoveOutliers(df, method='lof'),
+    'DetectAndRemoveOutliers[auto]': lambda df: DetectAndRemoveOutliers(df, method='auto'),
+    'NormalizeData': lambda df: NormalizeData(df),
+    'StandardizeData': lambda df: StandardizeData(df),
+    'AutoAnal': lambda df: AutoAnal(df),
+}
+
+# Методы выбросов не принимают пропуски: им подаём данные, заполненные медианой
+NEEDS_COMPLETE = ('DetectAndRemoveOutliers',)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help='размеры таблиц')
+    parser.add_argument('--numeric', type=int, default=8, help='числовых столбцов')
+    parser.add_argument('--categorical', type=int, default=2, help='категориальных столбцов')
+    parser.add_argument('--missing', type=float, default=0.05, help='доля пропусков')
+    parser.add_argument('--duplicates', type=float, default=0.05, help='доля дубликатов')
+    parser.add_argument('--outliers', type=float, default=0.01, help='доля выбросов')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--cases', help='регулярное выражение для отбора случаев')
+    parser.add_argument('--memory', action='store_true', help='дополнительно замерить пик памяти')
+    parser.add_argument('--output', help='файл для JSON (по умолчанию — stdout)')
+    args = parser.parse_args()
+
+    # Выборочные записи декоратора Logger включают tracemalloc и искажают замеры
+    recorder.configure(sample_rate=0.0)
+    selected = [name for name in CASES if not args.cases or re.search(args.cases, name)]
+    params = {key: getattr(args, key) for key in
+              ('numeric', 'categorical', 'missing', 'duplicates', 'outliers', 'seed', 'repeats')}
+    results = {'environment': environment(), 'params': params, 'results': []}
+
+    for rows in args.rows:
+        df = make_frame(rows, args.numeric, args.categorical, args.missing, args.duplicates,
+                        args.outliers, args.seed)
+        complete = df.fillna(df.median(numeric_only=True)).fillna('missing')
+        for name in selected:
+            frame = complete if name.startswith(NEEDS_COMPLETE) else df
+            try:
+                stats = measure(lambda: CASES[name](frame).run, args.repeats, args.memory)
+            except Exception as e:
+                stats = {'error': describe_error(e)}
+            record = {'case': name, 'rows': len(frame), 'cols': frame.shape[1], **stats}
+            results['results'].append(record)
+            summary = stats.get('error') or f"{stats['seconds_median']:.4f} s"
+            print(f"{name:<45} rows={len(frame):<8} {summary}", file=sys.stderr)
+
+    save(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
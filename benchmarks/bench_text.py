@@ -0,0 +1,152 @@
+"""
+Бенчмарк шагов TextProcessing и TextDetector.analyze_text на синтетических корпусах.
+
+    python benchmarks/bench_text.py --docs 1000 100000 1000000 --output before.json
+    python benchmarks/bench_text.py --docs 1000 --langs english --cases Tokenize
+    python benchmarks/bench_text.py --docs 100000 --jobs 1 4 8 --cases NormalizeText
+    python benchmarks/bench_text.py --docs 1000000 --langs russian --words 5 40 --cases lemmatize --slow-limit 1000000
+    python benchmarks/compare.py before.json after.json
+
+Медленные случаи (лемматизация, TextDetector по документам) на больших
+корпусах считаются по первым --slow-limit документам: docs в результате —
+сколько документов обработано на самом деле. Случаи, которые сами берут
+выборку (analyze_text по Series, analyze_corpus[sample]), пишут её размер
+в analyzed, и docs_per_sec считается по нему, а не по размеру корпуса.
+
+Корпуса строит benchmarks/textgen.py. В JSON: environment, params (words,
+seed, repeats, slow_limit) и results — по записи на случай, язык и размер:
+case, lang, docs, analyzed, seconds_min, seconds_median, repeats,
+docs_per_sec и peak_bytes (без --no-memory), либо error.
+"""
+import argparse
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.common import describe_error, environment, measure, save  # noqa: E402
+from benchmarks.textgen import make_corpus  # noqa: E402
+from Detector.textDetector import TextDetector, sample_size_for  # noqa: E402
+from Logger.calls import recorder  # noqa: E402
+from TextProcessing import (CleanText, HandleNumbers, NormalizeText, RemoveHTMLTags,  # noqa: E402
+                            RemoveSpecialChars, RemoveStopwords, TokenizeText)
+
+
+def _clean_chain(series):
+    return lambda: HandleNumbers(RemoveSpecialChars(RemoveHTMLTags(series).run()).run(), strategy='replace').run()
+
+
+def _detect_each(texts, lang):
+    detector = TextDetector(lang=lang)
+
+    def run():
+        for text in texts:
+            detector.analyze_text(text)
+    return run
+
+
+def _stopwords_loop(series, lang):
+    # Тот же шаг без векторного пути: цикл по токенам в Python
+    step = RemoveStopwords(series, lang=lang, tokenizer='simple')
+    return lambda: step._apply(series)
+
+
+# Имя случая -> (фабрика запуска по серии и языку, медленный ли случай)
+CASES = {
+    'RemoveHTMLTags': (lambda s, lang: RemoveHTMLTags(s).run, False),
+    'RemoveSpecialChars': (lambda s, lang: RemoveSpecialChars(s).run, False),
+    'HandleNumbers[remove]': (lambda s, lang: HandleNumbers(s, strategy='remove').run, False),
+    'HandleNumbers[replace]': (lambda s, lang: HandleNumbers(s, strategy='replace').run, False),
+    'Cleaning[chain]': (lambda s, lang: _clean_chain(s), False),
+    'CleanText': (lambda s, lang: CleanText(s, numbers='replace').run, False),
+    'RemoveStopwords[simple,arrow]': (lambda s, lang: RemoveStopwords(s, lang=lang, tokenizer='simple').run, False),
+    'RemoveStopwords[simple,python]': (lambda s, lang: _stopwords_loop(s, lang), False),
+    'TextDetector.analyze_text[series]': (lambda s, lang: lambda: TextDetector(lang=lang).analyze_text(s), False),
+    'TextDetector.analyze_text[each]': (lambda s, lang: _detect_each(s.tolist(), lang), True),
+    'TextDetector.analyze_corpus[sample]': (lambda s, lang: lambda: TextDetector(lang=lang).analyze_corpus(s), False),
+    'TextDetector.analyze_corpus[full]': (
+        lambda s, lang: lambda: TextDetector(lang=lang).analyze_corpus(s, full=True), False),
+}
+
+# Случаи, которые анализируют только выборку: имя -> число проанализированных документов корпуса
+ANALYZED = {
+    'TextDetector.analyze_text[series]': lambda docs: min(5, docs),
+    'TextDetector.analyze_corpus[sample]': sample_size_for,
+}
+
+# Обработчики с set_n_jobs: имя -> (фабрика обработчика, медленный ли случай)
+PARALLEL_CASES = {
+    'TokenizeText[word]': (lambda s, lang: TokenizeText(s, token_type='word', lang=lang), False),
+    'TokenizeText[word,regex]': (lambda s, lang: TokenizeText(s, token_type='word', lang=lang, tokenizer='regex'),
+                                 False),
+    'TokenizeText[sentence]': (lambda s, lang: TokenizeText(s, token_type='sentence', lang=lang), False),
+    'RemoveStopwords': (lambda s, lang: RemoveStopwords(s, lang=lang), False),
+    'RemoveStopwords[regex]': (lambda s, lang: RemoveStopwords(s, lang=lang, tokenizer='regex'), False),
+    'NormalizeText[stem]': (lambda s, lang: NormalizeText(s, method='stem', lang=lang), False),
+    'NormalizeText[stem,regex]': (lambda s, lang: NormalizeText(s, method='stem', lang=lang, tokenizer='regex'),
+                                  False),
+    'NormalizeText[lemmatize]': (lambda s, lang: NormalizeText(s, method='lemmatize', lang=lang), True),
+    'NormalizeText[lemmatize,per-doc]': (
+        lambda s, lang: NormalizeText(s, method='lemmatize', lang=lang, batch_size=1), True),
+}
+
+
+def _parallel(make, jobs):
+    return lambda s, lang: make(s, lang).set_n_jobs(jobs).run
+
+
+def cases(jobs):
+    """Все случаи; для n_jobs > 1 к обработчикам с set_n_jobs добавляются их параллельные версии"""
+    result = dict(CASES)
+    for n in jobs:
+        for name, (make, slow) in PARALLEL_CASES.items():
+            result[name if n == 1 else f'{name}[n_jobs={n}]'] = (_parallel(make, n), slow)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, nargs='+', default=[1000, 100000, 1000000], help='размеры корпусов')
+    parser.add_argument('--langs', nargs='+', default=['russian', 'english'], choices=['russian', 'english'])
+    parser.add_argument('--words', type=int, nargs=2, default=[20, 80], help='границы числа слов в документе')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1], help='значения n_jobs для set_n_jobs')
+    parser.add_argument('--slow-limit', type=int, default=10000, help='документов для медленных случаев')
+    parser.add_argument('--cases', help='регулярное выражение для отбора случаев')
+    parser.add_argument('--no-memory', action='store_true', help='не замерять пик памяти')
+    parser.add_argument('--output', help='файл для JSON (по умолчанию — stdout)')
+    args = parser.parse_args()
+
+    # Выборочные записи декоратора Logger включают tracemalloc и искажают замеры
+    recorder.configure(sample_rate=0.0)
+    available = cases(args.jobs)
+    selected = [name for name in available if not args.cases or re.search(args.cases, name)]
+    params = {'words': args.words, 'seed': args.seed, 'repeats': args.repeats, 'slow_limit': args.slow_limit}
+    results = {'environment': environment(('numpy', 'pandas', 'nltk', 'natasha')),
+               'params': params, 'results': []}
+
+    for docs in args.docs:
+        for lang in args.langs:
+            corpus = make_corpus(docs, lang, tuple(args.words), seed=args.seed)
+            for name in selected:
+                factory, slow = available[name]
+                texts = corpus.iloc[:args.slow_limit] if slow else corpus
+                analyzed = ANALYZED[name](len(texts)) if name in ANALYZED else len(texts)
+                try:
+                    stats = measure(lambda: factory(texts, lang), args.repeats, not args.no_memory)
+                    stats['docs_per_sec'] = analyzed / stats['seconds_median']
+                except Exception as e:
+                    stats = {'error': describe_error(e)}
+                results['results'].append({'case': name, 'lang': lang, 'docs': len(texts),
+                                           'analyzed': analyzed, **stats})
+                summary = stats.get('error') or f"{stats['docs_per_sec']:12.0f} док/с"
+                print(f"{name:<36} {lang:<8} docs={len(texts):<8} analyzed={analyzed:<8} {summary}",
+                      file=sys.stderr)
+
+    save(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Общие части бенчмарков: замеры, сведения об окружении, запись JSON"""
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def quiet():
+    """Глушит print() внутри обработчиков на время замера"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def measure(setup: Callable[[], Callable[[], object]], repeats: int = 3, memory: bool = False) -> Dict:
+    """
+    Замер функции, которую возвращает setup() (подготовка в замер не входит).
+
+    Возвращает минимальное и медианное время по repeats запускам и,
+    если memory=True, пик памяти по tracemalloc в отдельном запуске
+    (трассировка замедляет код, поэтому во время замеров времени она выключена).
+    """
+    times = []
+    for _ in range(repeats):
+        run = setup()
+        with quiet():
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    result = {'seconds_min': min(times), 'seconds_median': statistics.median(times), 'repeats': repeats}
+    if memory:
+        run = setup()
+        tracemalloc.start()
+        try:
+            with quiet():
+                run()
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def describe_error(error: Exception) -> str:
+    """Тип и первая содержательная строка ошибки (у NLTK сообщения многострочные)"""
+    lines = [line.strip() for line in str(error).splitlines() if any(c.isalnum() for c in line)]
+    return f"{type(error).__name__}: {lines[0] if lines else ''}"
+
+
+def environment(packages=('numpy', 'pandas', 'scikit-learn')) -> Dict:
+    """Версии и коммит, чтобы результаты разных прогонов можно было сопоставить"""
+    info = {'python': platform.python_version(), 'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    try:
+        info['commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                        capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        info['commit'] = None
+    for name in packages:
+        try:
+            info[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            info[name] = None
+    return info
+
+
+def save(results: Dict, output: Optional[str]) -> None:
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if output:
+        Path(output).write_text(text, encoding='utf-8')
+    else:
+        print(text)
@@ -0,0 +1,45 @@
+"""
+Сравнение двух прогонов бенчмарка (JSON из bench_processing.py или bench_text.py).
+
+    python benchmarks/compare.py before.json after.json --threshold 0.1
+
+Код выхода 1, если хотя бы один случай замедлился больше, чем на threshold.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Поля, которые определяют случай; остальные — замеры
+KEY_FIELDS = ('case', 'rows', 'cols', 'lang', 'docs')
+
+
+def _index(path: str) -> dict:
+    data = json.loads(Path(path).read_text(encoding='utf-8'))
+    return {tuple(str(r[f]) for f in KEY_FIELDS if f in r): r for r in data['results'] if 'error' not in r}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.1, help='допустимое замедление (0.1 = 10%%)')
+    args = parser.parse_args()
+
+    before, after = _index(args.before), _index(args.after)
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key]['seconds_median'], after[key]['seconds_median']
+        ratio = new / old if old else float('inf')
+        mark = ''
+        if ratio > 1 + args.threshold:
+            mark = '  <-- замедление'
+            regressions += 1
+        print(f"{' '.join(key):<60} {old:9.4f} -> {new:9.4f} s  x{ratio:.2f}{mark}")
+    for key in sorted(before.keys() ^ after.keys()):
+        print(f"{' '.join(key):<60} есть только в одном из прогонов")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Синтетические данные для бенчмарков: воспроизводимые при одном seed"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = np.array(['red', 'green', 'blue', 'yellow', 'black', 'white'])
+
+
+def make_frame(rows: int = 10000, numeric: int = 8, categorical: int = 2,
+               missing_rate: float = 0.05, duplicate_rate: float = 0.05,
+               outlier_rate: float = 0.01, seed: Optional[int] = 42) -> pd.DataFrame:
+    """
+    Таблица rows x (numeric + categorical).
+
+    Параметры:
+    -----------
+    missing_rate : float
+        Доля пропусков в каждом столбце
+    duplicate_rate : float
+        Доля строк, которые являются копиями других строк
+    outlier_rate : float
+        Доля значений числовых столбцов, заменённых выбросами (±10 сигм)
+    """
+    rng = np.random.default_rng(seed)
+    unique = max(1, rows - int(rows * duplicate_rate))
+
+    data = {}
+    for i in range(numeric):
+        # Разные масштабы и сдвиги, чтобы нормализация и стандартизация что-то делали
+        values = rng.normal(loc=i * 10.0, scale=1.0 + i, size=unique)
+        outliers = rng.random(unique) < outlier_rate
+        values[outliers] += rng.choice([-10.0, 10.0], size=outliers.sum()) * (1.0 + i)
+        data[f'num_{i}'] = values
+    for i in range(categorical):
+        data[f'cat_{i}'] = rng.choice(CATEGORIES, size=unique)
+    df = pd.DataFrame(data)
+
+    # Пропуски ставим до размножения строк, чтобы дубликаты совпадали целиком
+    if missing_rate > 0:
+        for col in df.columns:
+            mask = rng.random(unique) < missing_rate
+            df.loc[mask, col] = np.nan
+
+    if unique < rows:
+        copies = df.iloc[rng.integers(0, unique, size=rows - unique)]
+        df = pd.concat([df, copies], ignore_index=True)
+        df = df.iloc[rng.permutation(rows)].reset_index(drop=True)
+    return df
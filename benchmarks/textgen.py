@@ -0,0 +1,77 @@
+"""Синтетические корпуса для бенчмарков текста: воспроизводимые при одном seed"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Смесь знаменательных слов в разных формах и стоп-слов, чтобы стемминг,
+# лемматизация и удаление стоп-слов меняли текст
+VOCABULARY = {
+    'russian': (
+        'данные анализ анализа анализом модель модели моделями обучение обучения текст тексты текстов '
+        'слово слова словами предложение предложения система системы работа работы работает работали '
+        'результат результаты результатов пользователь пользователи пользователей задача задачи '
+        'быстрый быстрая быстрые новый новая новые большой большая большие важный важная важные '
+        'делать делает сделали получить получили использовать используем строить построили '
+        'и в не на я что тот быть с он а весь это как она по но они к у ты из мы за вы так же от '
+        'для о его ее до вот если уже или ни даже ну когда там где есть нет'
+    ).split(),
+    'english': (
+        'data analysis analyses analyzing model models modeling learning learned text texts word words '
+        'sentence sentences system systems work works working worked result results user users task '
+        'tasks fast faster fastest new newer large larger important build builds building built use '
+        'used using get gets got running runs ran studies studied better best '
+        'the a an and or but if of to in on at by for with from as is are was were be been it this '
+        'that these those he she they we you i not no so than then there here when where'
+    ).split(),
+}
+TAGS = [('<p>', '</p>'), ('<b>', '</b>'), ('<div class="x">', '</div>')]
+SPECIAL = ['@', '#', '%', '&', '*', '(', ')', '"', '—', '…']
+ENDINGS = np.array(['.', '.', '.', '!', '?'])
+
+
+def make_corpus(docs: int = 1000, lang: str = 'russian', words: tuple = (20, 80),
+                sentence_words: int = 12, html_rate: float = 0.2, number_rate: float = 0.05,
+                special_rate: float = 0.02, seed: Optional[int] = 42) -> pd.Series:
+    """
+    Серия из docs документов на языке lang ('russian' или 'english').
+
+    Параметры:
+    -----------
+    words : tuple
+        Границы числа слов в документе (равномерно)
+    sentence_words : int
+        Среднее число слов в предложении
+    html_rate : float
+        Доля документов с HTML-тегами
+    number_rate, special_rate : float
+        Доли слов, заменённых числами и спецсимволами
+    """
+    rng = np.random.default_rng(seed)
+    vocab = np.array(VOCABULARY[lang], dtype=object)
+    lengths = rng.integers(words[0], words[1] + 1, size=docs)
+    total = int(lengths.sum())
+
+    # Всё случайное генерируем одним вызовом на корпус, в цикле только склейка
+    tokens = vocab[rng.integers(0, len(vocab), size=total)]
+    numbers = rng.random(total) < number_rate
+    tokens[numbers] = rng.integers(0, 10000, size=numbers.sum()).astype(str)
+    special = rng.random(total) < special_rate
+    tokens[special] = rng.choice(SPECIAL, size=special.sum())
+    # Конец предложения после слова с вероятностью 1/sentence_words
+    ends = np.where(rng.random(total) < 1.0 / sentence_words, rng.choice(ENDINGS, size=total), '')
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    last = offsets[1:] - 1
+    ends[last] = np.where(ends[last] == '', '.', ends[last])
+    html = rng.random(docs) < html_rate
+
+    pieces = [word + end for word, end in zip(tokens.tolist(), ends.tolist())]
+    corpus = []
+    for i in range(docs):
+        text = ' '.join(pieces[offsets[i]:offsets[i + 1]])
+        text = text[0].upper() + text[1:]
+        if html[i]:
+            opening, closing = TAGS[i % len(TAGS)]
+            text = f"{opening}{text}{closing}"
+        corpus.append(text)
+    return pd.Series(corpus, name='text')
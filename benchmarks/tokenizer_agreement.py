@@ -0,0 +1,102 @@
+"""
+Согласие regex_tokenize с NLTK word_tokenize и выигрыш в скорости.
+
+    python benchmarks/tokenizer_agreement.py --docs 5000
+    python benchmarks/tokenizer_agreement.py --corpus pydoc readme
+    python benchmarks/tokenizer_agreement.py --input reviews.csv --column text --langs russian --show 5
+
+Для каждого языка печатает долю документов, токенизированных одинаково,
+долю совпавших токенов (пересечение мультимножеств к числу токенов NLTK)
+и во сколько раз regex_tokenize быстрее. По умолчанию корпус синтетический
+(benchmarks/textgen.py); --input берёт тексты из колонки CSV. Настоящий текст
+без загрузок дают --corpus pydoc (английский: справка Python из
+pydoc_data.topics) и --corpus readme (русский: README.md этого репозитория),
+документ — абзац. Нужна модель Punkt: nltk.download('punkt_tab').
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.common import environment, save  # noqa: E402
+from benchmarks.textgen import make_corpus  # noqa: E402
+from TextProcessing.tokenizers import regex_tokenize, word_tokenize  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _paragraphs(text: str) -> list:
+    return [part.strip() for part in text.split('\n\n') if part.strip()]
+
+
+def named_corpus(name: str):
+    """Язык и абзацы настоящего текста, доступного без загрузок"""
+    if name == 'pydoc':
+        from pydoc_data.topics import topics
+        return 'english', [part for key in sorted(topics) for part in _paragraphs(topics[key])]
+    return 'russian', _paragraphs((ROOT / 'README.md').read_text(encoding='utf-8'))
+
+
+def _timed(tokenize, texts, lang):
+    start = time.perf_counter()
+    tokens = [tokenize(text, language=lang) for text in texts]
+    return tokens, time.perf_counter() - start
+
+
+def agreement(texts, lang: str, show: int = 0) -> dict:
+    reference, nltk_seconds = _timed(word_tokenize, texts, lang)
+    fast, regex_seconds = _timed(regex_tokenize, texts, lang)
+
+    same_docs = same_tokens = 0
+    for text, expected, actual in zip(texts, reference, fast):
+        if expected == actual:
+            same_docs += 1
+        elif show:
+            show -= 1
+            print(f"{text[:200]!r}\n  nltk:  {expected}\n  regex: {actual}", file=sys.stderr)
+        same_tokens += sum((Counter(expected) & Counter(actual)).values())
+    total = sum(map(len, reference))
+    return {'lang': lang, 'docs': len(texts),
+            'doc_agreement': same_docs / len(texts) if texts else 1.0,
+            'token_agreement': same_tokens / total if total else 1.0,
+            'nltk_seconds': nltk_seconds, 'regex_seconds': regex_seconds,
+            'speedup': nltk_seconds / regex_seconds if regex_seconds else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=5000, help='документов в синтетическом корпусе')
+    parser.add_argument('--langs', nargs='+', default=['russian', 'english'], choices=['russian', 'english'])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--corpus', nargs='+', choices=['pydoc', 'readme'],
+                        help='настоящий текст вместо синтетического корпуса; язык задаёт корпус')
+    parser.add_argument('--input', help='CSV с текстами вместо синтетического корпуса')
+    parser.add_argument('--column', default='text', help='колонка с текстом в --input')
+    parser.add_argument('--show', type=int, default=0, help='сколько расхождений напечатать')
+    parser.add_argument('--output', help='файл для JSON (по умолчанию — stdout)')
+    args = parser.parse_args()
+
+    results = {'environment': environment(('nltk',)), 'results': []}
+    if args.corpus:
+        corpora = [(name, *named_corpus(name)) for name in args.corpus]
+    elif args.input:
+        texts = pd.read_csv(args.input, usecols=[args.column])[args.column].dropna().astype(str).tolist()
+        corpora = [(args.input, lang, texts) for lang in args.langs]
+    else:
+        corpora = [('synthetic', lang, make_corpus(args.docs, lang, seed=args.seed).tolist()) for lang in args.langs]
+    for corpus, lang, texts in corpora:
+        stats = dict(agreement(texts, lang, args.show), corpus=corpus)
+        results['results'].append(stats)
+        print(f"{corpus:<10} {lang:<8} docs={stats['docs']:<8} документы {stats['doc_agreement']:.2%}  "
+              f"токены {stats['token_agreement']:.2%}  быстрее в {stats['speedup']:.1f} раз", file=sys.stderr)
+
+    save(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
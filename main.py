@@ -1,13 +1,28 @@
+import os
 import uvicorn
 import logging
-from webserver import *
 
 logger = logging.getLogger(__name__)
 
+# Приложение импортируем после настройки окружения: DPRO_SHARED_DIR
+# должен быть известен webserver.route до создания хранилища
+if int(os.environ.get('DPRO_WORKERS', 1)) > 1:
+    os.environ.setdefault('DPRO_SHARED_DIR', 'shared_datasets')
+
+from webserver import *
+
+
 def main():
     logging.basicConfig(filename='logs.txt', level=logging.INFO)
-    uvicorn.run('main:app', reload=True)
+    workers = int(os.environ.get('DPRO_WORKERS', 1))
+    host = os.environ.get('DPRO_HOST', '127.0.0.1')
+    port = int(os.environ.get('DPRO_PORT', 8000))
     logger.info('stared')
+    if workers > 1:
+        # Боевой режим: несколько процессов делят датасеты через DPRO_SHARED_DIR
+        uvicorn.run('main:app', host=host, port=port, workers=workers)
+    else:
+        uvicorn.run('main:app', host=host, port=port, reload=True)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -16,6 +16,7 @@ setup(
         "pydantic~=2.11.4",
         "scikit-learn~=1.6.1",
         "natasha==1.5.0",
+        "slovnet~=0.6.0",
         "FLAML~=2.3.5",
         "scipy~=1.15.3"
     ]
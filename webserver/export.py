@@ -0,0 +1,135 @@
+import io
+import zlib
+from typing import Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# формат -> (MIME-тип, расширение файла)
+EXPORT_FORMATS = {
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'csv.gz': ('application/gzip', 'csv.gz'),
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """Файл-приёмник, из которого записанные байты забираются порциями"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def select_frame(df: pd.DataFrame, columns: Optional[List[str]] = None,
+                 start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+    """Проекция по столбцам и диапазону строк [start, stop) без копирования данных"""
+    if columns:
+        # Имена приходят строками из запроса, а заголовки бывают и числами (Excel)
+        labels = {str(col): col for col in df.columns}
+        missing = [col for col in columns if col not in labels]
+        if missing:
+            raise KeyError(f"Unknown columns: {missing}")
+        df = df[[labels[col] for col in columns]]
+    return df.iloc[start:stop]
+
+
+def _arrow_schema(df: pd.DataFrame):
+    """
+    Схема Arrow для всего фрейма и список object-столбцов со смешанными
+    значениями, которые перед записью приводятся к строкам.
+    """
+    to_string = [col for col in df.columns
+                 if df[col].dtype == object
+                 and pd.api.types.infer_dtype(df[col], skipna=True) not in ('string', 'empty')]
+    fields = []
+    for col in df.columns:
+        if df[col].dtype == object:
+            fields.append(pa.field(col, pa.string()))
+        else:
+            fields.append(pa.Schema.from_pandas(df[[col]].iloc[:0], preserve_index=False).field(0))
+    return pa.schema(fields), to_string
+
+
+def _record_batches(df: pd.DataFrame, batch_rows: int) -> Iterator[pa.RecordBatch]:
+    # Поля Arrow называются строками: иначе from_pandas не найдёт целый заголовок
+    # по имени поля, и ошибка случится уже посреди отданного ответа
+    if not all(isinstance(col, str) for col in df.columns):
+        df = df.set_axis([str(col) for col in df.columns], axis=1, copy=False)
+    schema, to_string = _arrow_schema(df)
+    for begin in range(0, len(df), batch_rows):
+        batch = df.iloc[begin:begin + batch_rows]
+        if to_string:
+            batch = batch.copy()
+            for col in to_string:
+                batch[col] = batch[col].where(batch[col].isna(), batch[col].astype(str))
+        yield pa.RecordBatch.from_pandas(batch, schema=schema, preserve_index=False)
+    if len(df) == 0:
+        yield pa.RecordBatch.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def iter_arrow(df: pd.DataFrame, batch_rows: int = 65536) -> Iterator[bytes]:
+    """Arrow IPC stream: по сообщению на каждый батч строк"""
+    sink = _ChunkSink()
+    writer = None
+    for batch in _record_batches(df, batch_rows):
+        if writer is None:
+            writer = ipc.new_stream(sink, batch.schema)
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def iter_parquet(df: pd.DataFrame, batch_rows: int = 65536) -> Iterator[bytes]:
+    """Parquet: каждый батч строк — отдельная row group, отдаётся сразу после записи"""
+    sink = _ChunkSink()
+    writer = None
+    for batch in _record_batches(df, batch_rows):
+        if writer is None:
+            writer = pq.ParquetWriter(sink, batch.schema)
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def iter_csv_gz(df: pd.DataFrame, batch_rows: int = 65536) -> Iterator[bytes]:
+    """CSV, сжатый gzip на лету"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for begin in range(0, max(len(df), 1), batch_rows):
+        text = df.iloc[begin:begin + batch_rows].to_csv(index=False, header=(begin == 0))
+        chunk = compressor.compress(text.encode('utf-8'))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def iter_export(df: pd.DataFrame, fmt: str, batch_rows: int = 65536) -> Iterator[bytes]:
+    if fmt == 'arrow':
+        return iter_arrow(df, batch_rows)
+    if fmt == 'parquet':
+        return iter_parquet(df, batch_rows)
+    if fmt == 'csv.gz':
+        return iter_csv_gz(df, batch_rows)
+    raise ValueError(f"Unsupported export format: {fmt}")
@@ -0,0 +1,206 @@
+import io
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+NA_VALUES = ['', ' ', 'NA', 'N/A', 'null']
+
+# Типы столбцов: тип Arrow и тип pandas, который вернёт read_parquet.
+# 'empty' — в столбце пока одни пропуски (как read_csv, храним float64)
+COLUMN_TYPES = {
+    'empty': (pa.float64(), 'float64'),
+    'int': (pa.int64(), 'Int64'),
+    'float': (pa.float64(), 'float64'),
+    'bool': (pa.bool_(), 'boolean'),
+    'string': (pa.string(), 'object'),
+}
+# Во что расширяется столбец, если значения следующего блока не подходят к его типу
+WIDER = {
+    'empty': ('int', 'float', 'bool', 'string'),
+    'int': ('float', 'string'),
+    'float': ('string',),
+    'bool': ('string',),
+    'string': (),
+}
+
+
+# Целые длиннее 15 цифр float64 хранит неточно: столбец с ними дробным не становится
+LONG_INTEGER = r'^\s*[+-]?\d{16,}\s*$'
+
+
+class IngestError(ValueError):
+    """Поток нельзя разобрать как CSV"""
+
+
+def _cast(values: pa.Array, kind: str) -> pa.Array:
+    """Строки столбца в тип kind; ArrowInvalid, если какое-то значение не подходит"""
+    if kind == 'string':
+        return values
+    if kind == 'empty':
+        if values.null_count < len(values):
+            raise pa.ArrowInvalid("столбец не пустой")
+        return pa.nulls(len(values), pa.float64())
+    return pc.utf8_trim_whitespace(values).cast(COLUMN_TYPES[kind][0])
+
+
+def _record_end(buffer: bytearray, last: bool) -> int:
+    """
+    Позиция перевода строки, на которой заканчивается запись CSV.
+
+    Перевод строки внутри кавычек записи не завершает, поэтому подходит
+    только тот, перед которым чётное число кавычек. Возвращает -1, если
+    такой позиции нет.
+    """
+    if last:
+        pos = buffer.rfind(b'\n')
+        while pos >= 0 and buffer.count(b'"', 0, pos) % 2:
+            pos = buffer.rfind(b'\n', 0, pos)
+        return pos
+    pos = buffer.find(b'\n')
+    while pos >= 0 and buffer.count(b'"', 0, pos) % 2:
+        pos = buffer.find(b'\n', pos + 1)
+    return pos
+
+
+class CsvStreamIngestor:
+    """
+    Потоковый приём CSV: байты разбираются блоками по мере поступления
+    и дописываются в Parquet-файл группами строк.
+
+    В памяти одновременно живёт только один блок (~block_bytes), поэтому
+    многогигабайтная загрузка не требует кратного запаса памяти.
+
+    Блоки пишутся во временный файл как есть, строками, а тип столбца
+    выводится по всем блокам: целые — Int64 (без потери точности и с
+    пропусками), дробные — float64, True/False — boolean, остальное —
+    строки; столбец из одних пропусков — float64. Если значения следующего
+    блока в тип не укладываются, столбец расширяется (целые → дробные →
+    строки; целые длиннее 15 цифр — сразу в строки). В close() группы строк
+    по одной переводятся из исходного текста в итоговые типы, поэтому
+    строковый столбец хранит текст файла как есть («007», «1.50»).
+    """
+
+    def __init__(self, path: Path, block_bytes: int = 8 * 1024 ** 2):
+        self.path = Path(path)
+        self.block_bytes = block_bytes
+        self.rows = 0
+        self.bytes_received = 0
+        self._buffer = bytearray()
+        self._header: Optional[bytes] = None
+        self._kinds: Optional[Dict[str, str]] = None
+        self._long_integers: set = set()
+        self._columns: Optional[List[str]] = None
+        self._raw_path = self.path.with_name(self.path.name + '.raw')
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def feed(self, data: bytes) -> int:
+        """Принять очередную порцию байтов; возвращает число разобранных строк"""
+        self.bytes_received += len(data)
+        self._buffer += data
+        if len(self._buffer) >= self.block_bytes:
+            self._flush(final=False)
+        return self.rows
+
+    def close(self) -> int:
+        """Разобрать остаток и закрыть файл; возвращает итоговое число строк"""
+        self._flush(final=True)
+        if self._writer is None:
+            raise IngestError("Файл не содержит данных")
+        self._writer.close()
+        self._writer = None
+        try:
+            self._write_typed()
+        finally:
+            self._raw_path.unlink(missing_ok=True)
+        return self.rows
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._raw_path.unlink(missing_ok=True)
+        self.path.unlink(missing_ok=True)
+
+    @property
+    def pending_bytes(self) -> int:
+        """Сколько байтов ждёт разбора"""
+        return len(self._buffer)
+
+    @property
+    def columns(self) -> List[str]:
+        return self._columns or []
+
+    def _flush(self, final: bool) -> None:
+        if self._header is None and not self._buffer:
+            return
+        if self._header is None:
+            end = _record_end(self._buffer, last=False)
+            if end < 0:
+                if not final:
+                    return
+                end = len(self._buffer) - 1
+            self._header = bytes(self._buffer[:end + 1])
+            if not self._header.endswith(b'\n'):
+                self._header += b'\n'
+            del self._buffer[:end + 1]
+
+        if final:
+            end = len(self._buffer) - 1
+        else:
+            end = _record_end(self._buffer, last=True)
+        if end < 0:
+            return
+        block = bytes(self._buffer[:end + 1])
+        del self._buffer[:end + 1]
+        if block.strip() or self._writer is None:
+            self._write_block(block)
+
+    def _write_block(self, block: bytes) -> None:
+        source = io.BytesIO(self._header + block)
+        try:
+            df = pd.read_csv(source, na_values=NA_VALUES, dtype=str)
+        except ValueError as e:
+            raise IngestError(f"Не удалось разобрать CSV после строки {self.rows}: {e}")
+
+        if self._kinds is None:
+            self._columns = [str(col) for col in df.columns]
+            self._kinds = dict.fromkeys(self._columns, 'empty')
+            self._writer = pq.ParquetWriter(self._raw_path, pa.schema([(name, pa.string()) for name in self._columns]))
+        arrays = []
+        for name, col in zip(self._columns, df.columns):
+            values = pa.array(df[col], type=pa.string(), from_pandas=True)
+            arrays.append(values)
+            self._kinds[name] = self._widen(name, values)
+        self._writer.write_table(pa.Table.from_arrays(arrays, names=self._columns))
+        self.rows += len(df)
+
+    def _widen(self, name: str, values: pa.Array) -> str:
+        """Самый узкий тип не уже текущего, в который укладываются значения блока"""
+        if pc.any(pc.match_substring_regex(values, LONG_INTEGER)).as_py():
+            self._long_integers.add(name)
+        kind = self._kinds[name]
+        for candidate in (kind,) + WIDER[kind]:
+            if candidate == 'float' and name in self._long_integers:
+                continue
+            try:
+                _cast(values, candidate)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                continue
+            return candidate
+        return 'string'
+
+    def _write_typed(self) -> None:
+        """Перевести временный файл из строк в итоговые типы по группам строк"""
+        empty = pd.DataFrame({name: pd.Series(dtype=COLUMN_TYPES[kind][1]) for name, kind in self._kinds.items()})
+        schema = pa.schema([pa.field(name, COLUMN_TYPES[kind][0]) for name, kind in self._kinds.items()],
+                           metadata=pa.Schema.from_pandas(empty, preserve_index=False).metadata)
+        with pq.ParquetFile(self._raw_path) as raw, pq.ParquetWriter(self.path, schema) as writer:
+            for i in range(raw.num_row_groups):
+                group = raw.read_row_group(i)
+                arrays = [_cast(group.column(j).combine_chunks(), self._kinds[name])
+                          for j, name in enumerate(self._columns)]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
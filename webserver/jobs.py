@@ -0,0 +1,366 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from DataProcessing import ProcessingCancelled
+from Logger.metrics import JOBS, JOB_PEAK_RSS, JOB_SECONDS, REGISTRY, peak_rss, reset_peak_rss
+
+
+class QueueFullError(RuntimeError):
+    """Очередь задач переполнена"""
+
+
+class JobProgress:
+    """
+    Колбэк прогресса, который передаётся в задачу.
+
+    Пересылает (доля, сообщение) в очередь событий менеджера и прерывает
+    задачу через ProcessingCancelled, если её отменили. Объект сериализуем,
+    поэтому работает и в пуле процессов.
+    """
+
+    def __init__(self, job_id: str, events, cancelled):
+        self.job_id = job_id
+        self.events = events
+        self.cancelled = cancelled
+        self._last = None
+
+    def __call__(self, fraction: float, message: str = '') -> None:
+        if self.job_id in self.cancelled:
+            raise ProcessingCancelled(f"Задача {self.job_id} отменена")
+        # Не засыпаем очередь мелкими шагами
+        state = (round(fraction, 2), message)
+        if state != self._last:
+            self._last = state
+            self.events.put((self.job_id, fraction, message))
+
+
+def _run_job(func: Callable, *args, progress=None, collect: bool = False):
+    """
+    Выполнить задачу и замерить её: (результат, секунды, пиковый RSS, метрики).
+
+    collect=True — задача идёт в процессе пула: метрики, накопленные за время
+    задачи, и пиковый RSS возвращаются родителю. При ошибке те же замеры
+    прикрепляются к исключению в атрибуте job_metrics.
+    """
+    if collect:
+        # Процесс мог унаследовать значения родителя при fork
+        REGISTRY.drain()
+        reset_peak_rss()
+    start = time.perf_counter()
+    try:
+        result = func(*args, progress=progress)
+    except BaseException as e:
+        if collect:
+            e.job_metrics = (time.perf_counter() - start, peak_rss(), REGISTRY.drain())
+        raise
+    if collect:
+        return result, time.perf_counter() - start, peak_rss(), REGISTRY.drain()
+    return result, time.perf_counter() - start, None, None
+
+
+class Job:
+    def __init__(self, job_id: str, kind: str, dataset_id: Optional[str]):
+        self.job_id = job_id
+        self.kind = kind
+        self.dataset_id = dataset_id
+        self.future: Optional[Future] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.cancelled = False
+        self.progress = 0.0
+        self.message = ''
+        self.saved = 0.0
+        self.polled = 0.0
+
+    @property
+    def status(self) -> str:
+        if self.finished is not None:
+            if self.cancelled:
+                return 'cancelled'
+            return 'failed' if self.error is not None else 'done'
+        if self.future is None or self.future.running():
+            return 'running'
+        return 'pending'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'dataset_id': self.dataset_id,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'error': self.error,
+            'created': self.created,
+            'finished': self.finished,
+        }
+
+
+class JobRecord(Job):
+    """Задача другого воркера, восстановленная из общего индекса"""
+
+    def __init__(self, state: Dict[str, Any]):
+        super().__init__(state['job_id'], state['kind'], state['dataset_id'])
+        self._status = state['status']
+        self.result = state['result']
+        self.error = state['error']
+        self.created = state['created']
+        self.finished = state['finished']
+        self.cancelled = self._status == 'cancelled'
+        self.progress = state['progress']
+        self.message = state['message']
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+
+class JobManager:
+    """
+    Выполнение тяжёлых операций вне event loop.
+
+    Задачи уходят в ограниченный пул процессов (или потоков, executor='thread'),
+    клиент сразу получает job_id и опрашивает статус. Если задач в очереди
+    больше max_pending, новые отклоняются с QueueFullError.
+
+    Задача получает именованный аргумент progress (JobProgress): через него
+    она сообщает о ходе работы и узнаёт об отмене.
+
+    Если передан index (SessionIndex), состояние задач дублируется в него:
+    статус, результат и отмену видят все воркеры веб-сервиса.
+    """
+
+    def __init__(self, max_workers: int = 2, executor: str = 'process',
+                 max_pending: int = 32, keep_finished: int = 1000, index=None):
+        if executor not in ('process', 'thread'):
+            raise ValueError(f"Неизвестный тип пула: {executor}")
+        self.max_workers = max_workers
+        self.executor_type = executor
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self.index = index
+        self._executor = None
+        self._manager = None
+        self._events = None
+        self._cancelled = None
+        self._listener: Optional[threading.Thread] = None
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # Пул создаём лениво: модуль импортируется и в дочерних процессах
+        if self._executor is None:
+            if self.executor_type == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _start_events(self) -> None:
+        if self._events is not None:
+            return
+        if self.executor_type == 'process':
+            # Очередь и флаги отмены должны быть видны дочерним процессам
+            self._manager = multiprocessing.Manager()
+            self._events = self._manager.Queue()
+            self._cancelled = self._manager.dict()
+        else:
+            self._events = queue.Queue()
+            self._cancelled = {}
+        self._listener = threading.Thread(target=self._listen, name='job-progress', daemon=True)
+        self._listener.start()
+
+    def _listen(self) -> None:
+        polled = time.time()
+        while True:
+            # С общим индексом раз в секунду проверяем отмены, запрошенные другими воркерами
+            if self.index is not None and time.time() - polled >= 1:
+                self._poll_cancel_requests()
+                polled = time.time()
+            try:
+                event = self._events.get(timeout=1 if self.index is not None else None)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            if event is None:
+                return
+            job_id, fraction, message = event
+            job = self._jobs.get(job_id)
+            if job is not None and job.finished is None:
+                self.update(job, fraction, message)
+
+    def _poll_cancel_requests(self) -> None:
+        for job_id in self.index.cancel_requests(os.getpid()):
+            if job_id in self._jobs:
+                self.cancel(job_id)
+
+    def submit(self, kind: str, dataset_id: Optional[str], func: Callable, *args,
+               on_done: Optional[Callable[[Any], Any]] = None) -> Job:
+        """
+        Поставить func(*args) в очередь.
+
+        on_done(result) вызывается в родительском процессе после успешного
+        выполнения; его возвращаемое значение становится результатом задачи.
+        """
+        job = Job(uuid.uuid4().hex, kind, dataset_id)
+        with self._lock:
+            if self.pending() >= self.max_pending:
+                raise QueueFullError("Слишком много задач в очереди")
+            self._start_events()
+            self._jobs[job.job_id] = job
+            self._prune()
+        progress = JobProgress(job.job_id, self._events, self._cancelled)
+        job.future = self.executor.submit(_run_job, func, *args, progress=progress,
+                                          collect=self.executor_type == 'process')
+        self._save(job)
+        job.future.add_done_callback(lambda future: self._finish(job, future, on_done))
+        return job
+
+    def track(self, kind: str, dataset_id: Optional[str] = None, job_id: Optional[str] = None) -> Job:
+        """
+        Завести задачу, которая выполняется вне пула (например, приём загрузки).
+        Ход работы сообщается через update(), итог — через complete()/fail().
+        """
+        job = Job(job_id or uuid.uuid4().hex, kind, dataset_id)
+        with self._lock:
+            if job.job_id in self._jobs:
+                raise KeyError(f"Задача {job.job_id} уже существует")
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._save(job)
+        return job
+
+    def update(self, job: Job, fraction: float, message: str = '') -> None:
+        job.progress = fraction
+        job.message = message
+        # В индекс пишем не чаще двух раз в секунду: загрузка обновляет прогресс на каждый кусок
+        if self.index is not None and time.time() - job.saved >= 0.5:
+            job.saved = time.time()
+            self.index.update_job(job.job_id, fraction, message, job.status)
+
+    def complete(self, job: Job, result: Any) -> None:
+        job.result = result
+        job.progress = 1.0
+        job.finished = time.time()
+        self._observe(job, (job.finished - job.created, None, None))
+        self._save(job)
+
+    def fail(self, job: Job, error: str) -> None:
+        job.error = error
+        job.finished = time.time()
+        self._observe(job, (job.finished - job.created, None, None))
+        self._save(job)
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        state = self.index.load_job(job_id) if self.index is not None else None
+        if state is None:
+            raise KeyError(job_id)
+        return JobRecord(state)
+
+    def cancel(self, job_id: str) -> Job:
+        """
+        Отменить задачу. Ожидающая в очереди снимается сразу, выполняющаяся
+        прерывается при ближайшем сообщении о прогрессе.
+        """
+        job = self.get(job_id)
+        if isinstance(job, JobRecord):
+            # Задача выполняется в другом воркере: он снимет её сам
+            self.index.request_cancel(job_id)
+            return job
+        if job.finished is None:
+            job.cancelled = True
+            # Задачу вне пула (track) снимает её владелец, проверяя cancel_requested()
+            if job.future is not None and self._cancelled is not None:
+                self._cancelled[job_id] = True
+                job.future.cancel()
+        return job
+
+    def cancel_requested(self, job: Job) -> bool:
+        """
+        Отменена ли задача вне пула: здесь или, через общий индекс, в другом
+        воркере. Индекс опрашивается не чаще раза в секунду.
+        """
+        if not job.cancelled and self.index is not None and time.time() - job.polled >= 1:
+            job.polled = time.time()
+            job.cancelled = job.job_id in self.index.cancel_requests(os.getpid())
+        return job.cancelled
+
+    def pending(self) -> int:
+        """Число незавершённых задач"""
+        return sum(1 for job in self._jobs.values() if job.finished is None)
+
+    def is_busy(self, dataset_id: str) -> bool:
+        """Есть ли незавершённая задача над этим датасетом"""
+        with self._lock:
+            if any(job.dataset_id == dataset_id and job.finished is None for job in self._jobs.values()):
+                return True
+        return self.index is not None and self.index.is_busy(dataset_id)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._events is not None:
+            self._events.put(None)
+            self._listener.join(timeout=1)
+            if self._manager is not None:
+                self._manager.shutdown()
+            self._manager = self._events = self._cancelled = None
+
+    def _finish(self, job: Job, future: Future, on_done) -> None:
+        measured = None
+        try:
+            result, *measured = future.result()
+            job.result = on_done(result) if on_done is not None else result
+            # Задача успела завершиться до отмены
+            job.cancelled = False
+            job.progress = 1.0
+        except (CancelledError, ProcessingCancelled) as e:
+            measured = measured or getattr(e, 'job_metrics', None)
+            job.cancelled = True
+            job.error = "Задача отменена"
+        except Exception as e:
+            measured = measured or getattr(e, 'job_metrics', None)
+            job.error = f"{type(e).__name__}: {e}"
+        job.finished = time.time()
+        self._observe(job, measured)
+        if self._cancelled is not None:
+            self._cancelled.pop(job.job_id, None)
+        self._save(job)
+
+    @staticmethod
+    def _observe(job: Job, measured) -> None:
+        """Метрики завершённой задачи; measured — (секунды, пиковый RSS, метрики процесса пула)"""
+        JOBS.inc(kind=job.kind, status=job.status)
+        if not measured:
+            return
+        seconds, rss, snapshot = measured
+        JOB_SECONDS.observe(seconds, kind=job.kind)
+        if rss is not None:
+            JOB_PEAK_RSS.observe(rss, kind=job.kind)
+        REGISTRY.merge(snapshot)
+
+    def _save(self, job: Job) -> None:
+        if self.index is not None:
+            job.saved = time.time()
+            self.index.save_job(job.to_dict(), job.result)
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished is not None]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
@@ -0,0 +1,39 @@
+import json
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def sort_index(series: pd.Series, ascending: bool = True) -> np.ndarray:
+    """
+    Позиции строк в порядке сортировки столбца (устойчивая сортировка,
+    пропуски в конце). Считается один раз на версию датасета, дальше
+    страница достаётся выборкой по готовому индексу.
+    """
+    series = series.reset_index(drop=True)
+    try:
+        ordered = series.sort_values(ascending=ascending, kind='stable', na_position='last')
+    except TypeError:
+        # Смешанные типы в object-столбце сравниваем по строковому виду
+        ordered = series.astype(str).where(series.notna()).sort_values(
+            ascending=ascending, kind='stable', na_position='last')
+    return ordered.index.to_numpy()
+
+
+def preview_page(df: pd.DataFrame, offset: int, limit: int, columns: Optional[List[str]] = None,
+                 order: Optional[np.ndarray] = None) -> str:
+    """
+    Окно строк [offset, offset + limit) в компактном JSON:
+    {"total": ..., "offset": ..., "columns": [...], "rows": [[...], ...]}
+    """
+    if order is not None:
+        window = df.iloc[order[offset:offset + limit]]
+    else:
+        window = df.iloc[offset:offset + limit]
+    if columns:
+        window = window[columns]
+    rows = window.to_json(orient='values', date_format='iso', default_handler=str)
+    header = json.dumps({"total": len(df), "offset": offset, "columns": [str(col) for col in window.columns]},
+                        ensure_ascii=False)
+    return header[:-1] + ', "rows": ' + rows + '}'
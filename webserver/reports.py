@@ -0,0 +1,105 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+REPORT_MODES = ('full', 'minimal')
+
+
+def column_fingerprints(df: pd.DataFrame) -> Dict[str, str]:
+    """
+    Отпечаток содержимого каждого столбца: хеш значений (без индекса) и типа.
+    Совпадение отпечатков означает, что столбец после обработки не менялся.
+    """
+    fingerprints = {}
+    for col in df.columns:
+        series = df[col]
+        try:
+            hashed = pd.util.hash_pandas_object(series, index=False).values
+        except TypeError:
+            # Нехешируемые значения (списки, словари) хешируем по строковому виду
+            hashed = pd.util.hash_pandas_object(series.astype(str), index=False).values
+        digest = hashlib.blake2b(hashed.tobytes(), digest_size=16)
+        digest.update(str(series.dtype).encode())
+        fingerprints[str(col)] = digest.hexdigest()
+    return fingerprints
+
+
+def dataset_fingerprint(fingerprints: Dict[str, str]) -> str:
+    """Отпечаток всего датасета с учётом порядка столбцов"""
+    digest = hashlib.blake2b(digest_size=16)
+    for col, fingerprint in fingerprints.items():
+        digest.update(col.encode())
+        digest.update(fingerprint.encode())
+    return digest.hexdigest()
+
+
+def sample_frame(df: pd.DataFrame, sample: Optional[int]) -> pd.DataFrame:
+    """Детерминированная выборка строк: для одинаковой длины — одни и те же строки"""
+    if sample is None or len(df) <= sample:
+        return df
+    return df.sample(sample, random_state=42)
+
+
+class ReportCache:
+    """
+    Кэш отчётов ydata-profiling по отпечатку данных.
+
+    Хранит готовые HTML-отчёты (ключ — отпечаток датасета, режим и выборка)
+    и отдельные разделы по столбцам (ключ — отпечаток столбца), чтобы после
+    обработки части столбцов пересчитывать только изменившиеся.
+    """
+
+    def __init__(self, max_reports: int = 32, max_columns: int = 4096):
+        self.max_reports = max_reports
+        self.max_columns = max_columns
+        self._reports: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._columns: "OrderedDict[Tuple, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def report_key(fingerprints: Dict[str, str], mode: str, sample: Optional[int]) -> Tuple:
+        return dataset_fingerprint(fingerprints), mode, sample
+
+    def get_report(self, key: Tuple) -> Optional[str]:
+        with self._lock:
+            html = self._reports.get(key)
+            if html is not None:
+                self._reports.move_to_end(key)
+            return html
+
+    def put_report(self, key: Tuple, html: str) -> None:
+        with self._lock:
+            self._reports[key] = html
+            self._reports.move_to_end(key)
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+
+    def missing_columns(self, fingerprints: Dict[str, str], mode: str, sample: Optional[int]) -> List[str]:
+        """Столбцы, для которых раздел ещё не посчитан"""
+        with self._lock:
+            return [col for col, fingerprint in fingerprints.items()
+                    if (fingerprint, mode, sample) not in self._columns]
+
+    def put_columns(self, fingerprints: Dict[str, str], mode: str, sample: Optional[int],
+                    sections: Dict[str, dict]) -> None:
+        with self._lock:
+            for col, section in sections.items():
+                key = (fingerprints[col], mode, sample)
+                self._columns[key] = section
+                self._columns.move_to_end(key)
+            while len(self._columns) > self.max_columns:
+                self._columns.popitem(last=False)
+
+    def get_columns(self, fingerprints: Dict[str, str], mode: str, sample: Optional[int],
+                    columns: Iterable[str]) -> Dict[str, dict]:
+        with self._lock:
+            sections = {}
+            for col in columns:
+                key = (fingerprints[col], mode, sample)
+                if key in self._columns:
+                    self._columns.move_to_end(key)
+                    sections[col] = self._columns[key]
+            return sections
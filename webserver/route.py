@@ -1,12 +1,25 @@
 from fastapi import HTTPException, UploadFile, File
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from IDProcessing import DataObject, IDProcessing
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+import asyncio
+import json
+import os
+import uuid
 import pandas as pd
 from pathlib import Path
-from ydata_profiling import ProfileReport
+from webserver.storage import DatasetStore
+from webserver.jobs import JobManager, QueueFullError
+from webserver.tasks import process_dataset, build_report, build_column_sections
+from webserver.ingest import CsvStreamIngestor, IngestError
+from webserver.reports import REPORT_MODES, ReportCache, column_fingerprints
+from webserver.export import EXPORT_FORMATS, iter_export, select_frame
+from webserver.preview import preview_page, sort_index
+from webserver.shared import SessionIndex, SharedDatasetStore
+from Logger.metrics import QUEUE_DEPTH, REGISTRY
 
 Path("static").mkdir(exist_ok=True)
 Path("templates").mkdir(exist_ok=True)
@@ -16,32 +29,155 @@ app = FastAPI()
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
-current_df = {}
-report_html = None
+# DPRO_SHARED_DIR задаёт каталог, общий для нескольких воркеров (см. main.py)
+shared_dir = os.environ.get('DPRO_SHARED_DIR')
+if shared_dir:
+    index = SessionIndex(Path(shared_dir) / 'sessions.sqlite')
+    store = SharedDatasetStore(index, shared_dir)
+else:
+    index = None
+    store = DatasetStore()
+jobs = JobManager(max_workers=int(os.environ.get('DPRO_MAX_WORKERS', 2)),
+                  executor=os.environ.get('DPRO_EXECUTOR', 'process'), index=index)
+reports = ReportCache()
+
+
+def get_dataset(dataset_id: str) -> pd.DataFrame:
+    try:
+        return store.get(dataset_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Dataset {dataset_id} not found")
+
+
+def submit_job(kind: str, dataset_id: str, func, *args, on_done=None) -> JSONResponse:
+    if jobs.is_busy(dataset_id):
+        raise HTTPException(status_code=409, detail=f"Dataset {dataset_id} is already being processed")
+    try:
+        job = jobs.submit(kind, dataset_id, func, *args, on_done=on_done)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return JSONResponse(content=job.to_dict(), status_code=202)
+
+
+async def cached_meta(dataset_id: str, df: pd.DataFrame, key, compute, *args):
+    """
+    Значение, посчитанное по текущей версии датасета, из метаданных хранилища.
+    Метаданные сбрасываются при замене датасета, id(df) защищает от гонки с заменой.
+    """
+    meta = store.meta(dataset_id)
+    cached = meta.get(key)
+    if cached is not None and cached[0] == id(df):
+        return cached[1]
+    value = await run_in_threadpool(compute, *args)
+    meta[key] = (id(df), value)
+    return value
+
+
+async def get_fingerprints(dataset_id: str, df: pd.DataFrame) -> dict:
+    """Отпечатки столбцов текущей версии датасета (считаются один раз на версию)"""
+    return await cached_meta(dataset_id, df, 'fingerprints', column_fingerprints, df)
+
+
+def check_report_mode(mode: str) -> None:
+    if mode not in REPORT_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown report mode: {mode}")
+
+
+def check_sample(sample: Optional[int]) -> None:
+    if sample is not None and sample <= 0:
+        raise HTTPException(status_code=400, detail=f"sample must be a positive number of rows: {sample}")
+
+
+def get_job(job_id: str):
+    try:
+        return jobs.get(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
 
 @app.get("/DataFrame/", tags=['Обработка данных'])
-async def processing_data(id: int):
-    global current_df
-    data = DataObject(method_id=id, params=[current_df])
-    if type(current_df) is pd.DataFrame:
-        tmp = IDProcessing(data)
-        current_df = tmp.get()
-        print(type(current_df))
-        return JSONResponse(content={"message": "DataFrame processing successfully", "shape": current_df.shape})
-    raise HTTPException
+async def processing_data(id: int, dataset_id: str):
+    current_df = get_dataset(dataset_id)
+
+    def save_result(result: pd.DataFrame) -> dict:
+        store.put(dataset_id, result)
+        return {"message": "DataFrame processing successfully",
+                "dataset_id": dataset_id, "shape": result.shape}
+
+    return submit_job('process', dataset_id, process_dataset, id, current_df, on_done=save_result)
+
+
+@app.get("/jobs/{job_id}", tags=['Задачи'])
+async def job_status(job_id: str):
+    return JSONResponse(content=get_job(job_id).to_dict())
+
+
+@app.get("/jobs/{job_id}/events", tags=['Задачи'])
+async def job_events(job_id: str):
+    get_job(job_id)
+
+    async def stream():
+        last = None
+        while True:
+            # Задачу другого воркера перечитываем из общего индекса на каждом шаге
+            job = get_job(job_id)
+            state = job.to_dict()
+            if state != last:
+                yield f"data: {json.dumps(state)}\n\n"
+                last = state
+            if job.finished is not None:
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.post("/jobs/{job_id}/cancel", tags=['Задачи'])
+async def job_cancel(job_id: str):
+    get_job(job_id)
+    return JSONResponse(content=jobs.cancel(job_id).to_dict())
+
+
+@app.get("/jobs/{job_id}/result", tags=['Задачи'])
+async def job_result(job_id: str):
+    job = get_job(job_id)
+    if job.status == 'failed':
+        return JSONResponse(content={"error": job.error}, status_code=500)
+    if job.status == 'cancelled':
+        return JSONResponse(content={"error": job.error}, status_code=410)
+    if job.status != 'done':
+        return JSONResponse(content={"error": "Job is not finished", "status": job.status}, status_code=409)
+    if job.kind == 'report':
+        report_html = store.get_report(job.dataset_id)
+        if report_html is None:
+            # Датасет после задачи изменили или удалили, и отчёт к нему отвязан
+            return JSONResponse(content={"error": "Report is no longer available"}, status_code=410)
+        return HTMLResponse(content=report_html, status_code=200)
+    return JSONResponse(content=job.result)
+
+
+@app.get("/metrics", tags=['Задачи'])
+async def metrics():
+    """Метрики обработчиков и очереди задач в текстовом формате Prometheus"""
+    QUEUE_DEPTH.set(jobs.pending())
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request):
+async def read_root(request: Request, dataset_id: Optional[str] = None):
     return templates.TemplateResponse(
         "notebook.html",
-        {"request": request, "notebook_name": "DPro Data Analysis", "report_html": report_html}
+        {"request": request, "notebook_name": "DPro Data Analysis", "report_html": store.get_report(dataset_id)}
     )
 
 
+@app.on_event("shutdown")
+async def shutdown_jobs():
+    jobs.shutdown()
+
+
 @app.post("/uploadfile/")
 async def create_upload_file(file: UploadFile = File(...)):
-    global current_df
     try:
         if file.filename.endswith('.csv'):
             current_df = pd.read_csv(file.file, na_values=['', ' ', 'NA', 'N/A', 'null'])
@@ -50,26 +186,164 @@ async def create_upload_file(file: UploadFile = File(...)):
         else:
             return JSONResponse(content={"error": "Unsupported file format"}, status_code=400)
 
-        return JSONResponse(content={"message": "File uploaded successfully", "shape": current_df.shape})
+        dataset_id = store.create(current_df)
+        return JSONResponse(content={"message": "File uploaded successfully",
+                                     "dataset_id": dataset_id, "shape": current_df.shape})
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
-@app.post("/generate_report/")
-async def generate_report():
-    global current_df, report_html
+@app.post("/uploadfile/stream/")
+async def stream_upload_file(request: Request, filename: str, upload_id: Optional[str] = None):
+    """
+    Потоковая загрузка CSV: тело запроса — сырые байты файла.
+    CSV разбирается блоками по мере поступления и пишется на диск в Parquet;
+    ход приёма виден в /jobs/{upload_id}, если клиент передал upload_id;
+    POST /jobs/{upload_id}/cancel прерывает приём и удаляет принятое.
+    """
+    if not filename.endswith('.csv'):
+        return JSONResponse(content={"error": "Streaming upload supports only CSV"}, status_code=400)
+    dataset_id = uuid.uuid4().hex
     try:
-        profile = ProfileReport(current_df, title=f"Your New Magic Data {chr(129392)} \u2728... or not, if you just loaded it {chr(128577)}")
-        report_html = profile.to_html()
-        return HTMLResponse(content=report_html, status_code=200)
+        job = jobs.track('upload', dataset_id, job_id=upload_id)
+    except KeyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    total = int(request.headers.get('content-length') or 0)
+    ingestor = CsvStreamIngestor(store.spill_path(dataset_id))
+    try:
+        async for chunk in request.stream():
+            if jobs.cancel_requested(job):
+                break
+            # Разбор блока уводим из event loop, мелкие порции просто копим
+            if ingestor.pending_bytes + len(chunk) >= ingestor.block_bytes:
+                rows = await run_in_threadpool(ingestor.feed, chunk)
+            else:
+                rows = ingestor.feed(chunk)
+            jobs.update(job, ingestor.bytes_received / total if total else 0.0, f"Прочитано строк: {rows}")
+        else:
+            rows = await run_in_threadpool(ingestor.close)
+    except IngestError as e:
+        ingestor.abort()
+        jobs.fail(job, str(e))
+        return JSONResponse(content={"error": str(e)}, status_code=400)
     except Exception as e:
+        ingestor.abort()
+        jobs.fail(job, str(e))
         return JSONResponse(content={"error": str(e)}, status_code=500)
+    if job.cancelled:
+        # Отмену могли запросить и во время close(): файл датасета не регистрируем
+        ingestor.abort()
+        jobs.fail(job, "Задача отменена")
+        return JSONResponse(content={"error": "Upload cancelled"}, status_code=410)
+
+    store.register_file(dataset_id, ingestor.path)
+    result = {"message": "File uploaded successfully", "dataset_id": dataset_id,
+              "shape": [rows, len(ingestor.columns)]}
+    jobs.complete(job, result)
+    return JSONResponse(content=result)
+
+
+@app.post("/generate_report/")
+async def generate_report(dataset_id: str, mode: str = 'full', sample: Optional[int] = None):
+    """
+    mode='minimal' — облегчённый отчёт без корреляций и взаимодействий,
+    sample — построить отчёт по случайной выборке из sample строк.
+    Повторный запрос по неизменённым данным отдаётся из кэша сразу. Разделы
+    по столбцам переиспользует только /report_summary/: HTML-отчёт строится
+    по всему датасету, и после изменения любого столбца — заново целиком.
+    """
+    check_report_mode(mode)
+    check_sample(sample)
+    current_df = get_dataset(dataset_id)
+    key = reports.report_key(await get_fingerprints(dataset_id, current_df), mode, sample)
+    cached = reports.get_report(key)
+    if cached is not None:
+        store.set_report(dataset_id, cached)
+        return HTMLResponse(content=cached, status_code=200)
+
+    def save_report(report_html: str) -> None:
+        reports.put_report(key, report_html)
+        store.set_report(dataset_id, report_html)
+
+    return submit_job('report', dataset_id, build_report, current_df, mode, sample, on_done=save_report)
+
+
+@app.get("/report_summary/")
+async def report_summary(dataset_id: str, mode: str = 'minimal', sample: Optional[int] = None):
+    """
+    Статистика отчёта по столбцам в JSON. Разделы кэшируются по отпечатку
+    столбца, поэтому после обработки пересчитываются только изменившиеся столбцы.
+    """
+    check_report_mode(mode)
+    check_sample(sample)
+    current_df = get_dataset(dataset_id)
+    fingerprints = await get_fingerprints(dataset_id, current_df)
+    missing = reports.missing_columns(fingerprints, mode, sample)
+
+    def collect(sections: Optional[dict] = None) -> dict:
+        if sections:
+            reports.put_columns(fingerprints, mode, sample, sections)
+        return {"dataset_id": dataset_id, "mode": mode, "sample": sample,
+                "recomputed": missing,
+                "variables": reports.get_columns(fingerprints, mode, sample, fingerprints)}
+
+    if not missing:
+        return JSONResponse(content=collect())
+    return submit_job('summary', dataset_id, build_column_sections, current_df, missing, mode, sample,
+                      on_done=collect)
+
+
+@app.get("/export/")
+async def export_data(dataset_id: str, format: str = 'parquet', columns: Optional[str] = None,
+                      start: int = 0, stop: Optional[int] = None, batch_rows: int = 65536):
+    """
+    Выгрузка датасета потоком: Arrow IPC, Parquet или CSV в gzip.
+    columns — список столбцов через запятую, start/stop — диапазон строк.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+    if batch_rows <= 0:
+        raise HTTPException(status_code=400, detail="batch_rows must be positive")
+    current_df = get_dataset(dataset_id)
+    try:
+        frame = select_frame(current_df, columns.split(',') if columns else None, start, stop)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(iter_export(frame, format, batch_rows), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{dataset_id}.{extension}"'})
+
+
+@app.get("/preview/")
+async def preview(dataset_id: str, offset: int = 0, limit: int = 100, columns: Optional[str] = None,
+                  sort: Optional[str] = None, ascending: bool = True):
+    """
+    Страница строк для просмотра в интерфейсе. Индекс сортировки по столбцу
+    строится при первом запросе и переиспользуется, пока датасет не изменится.
+    """
+    if offset < 0 or not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit in [1, 1000]")
+    current_df = get_dataset(dataset_id)
+    selected = columns.split(',') if columns else None
+    unknown = [col for col in (selected or []) + ([sort] if sort else []) if col not in current_df.columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {unknown}")
+
+    order = None
+    if sort:
+        order = await cached_meta(dataset_id, current_df, ('sort', sort, ascending),
+                                  sort_index, current_df[sort], ascending)
+    return Response(content=preview_page(current_df, offset, limit, selected, order),
+                    media_type="application/json")
 
 
 @app.get("/save_data/")
-async def save():
-    global current_df
+async def save(dataset_id: str):
+    current_df = get_dataset(dataset_id)
     try:
-        current_df.to_csv('Processed Data.csv')
-        return JSONResponse(content={"Ваш файл сохранён как Processed Data.csv"}, status_code=200)
+        file_name = f'Processed Data {dataset_id}.csv'
+        current_df.to_csv(file_name)
+        return JSONResponse(content={"message": f"Ваш файл сохранён как {file_name}"}, status_code=200)
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
@@ -0,0 +1,315 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from webserver.storage import DatasetStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset_id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    report_path TEXT,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    dataset_id TEXT,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    error TEXT,
+    result TEXT,
+    created REAL NOT NULL,
+    finished REAL,
+    owner INTEGER NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_dataset ON jobs (dataset_id, finished);
+"""
+
+
+def _alive(pid: int) -> bool:
+    """Жив ли процесс-владелец задачи (воркер мог упасть, не дописав статус)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class SessionIndex:
+    """
+    Общий для всех воркеров индекс сессий в SQLite.
+
+    Хранит, где лежит текущая версия каждого датасета и его отчёт, а также
+    состояние задач, чтобы статус и результат мог отдать любой воркер.
+    У каждого потока своё соединение; WAL позволяет читать во время записи.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def dataset(self, dataset_id: str) -> Optional[Tuple[Path, int]]:
+        """Путь и версия текущего файла датасета"""
+        row = self._connect().execute(
+            'SELECT path, version FROM datasets WHERE dataset_id = ?', (dataset_id,)).fetchone()
+        return (Path(row[0]), row[1]) if row else None
+
+    def set_dataset(self, dataset_id: str, path: Path) -> Tuple[int, Optional[Path]]:
+        """
+        Записать новую версию датасета; возвращает её номер и путь прежнего файла.
+        Отчёт по прежней версии отвязывается.
+        """
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT path, version FROM datasets WHERE dataset_id = ?', (dataset_id,)).fetchone()
+            version = row[1] + 1 if row else 1
+            connection.execute(
+                'INSERT INTO datasets (dataset_id, path, version, updated) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (dataset_id) DO UPDATE SET path = excluded.path, '
+                'version = excluded.version, updated = excluded.updated, report_path = NULL',
+                (dataset_id, str(path), version, time.time()))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return version, (Path(row[0]) if row else None)
+
+    def delete_dataset(self, dataset_id: str) -> Optional[Tuple[Path, Optional[Path]]]:
+        """Удалить запись; возвращает пути файла данных и отчёта"""
+        connection = self._connect()
+        row = connection.execute(
+            'SELECT path, report_path FROM datasets WHERE dataset_id = ?', (dataset_id,)).fetchone()
+        connection.execute('DELETE FROM datasets WHERE dataset_id = ?', (dataset_id,))
+        if row is None:
+            return None
+        return Path(row[0]), (Path(row[1]) if row[1] else None)
+
+    def set_report(self, dataset_id: str, path: Path) -> None:
+        self._connect().execute('UPDATE datasets SET report_path = ? WHERE dataset_id = ?',
+                                (str(path), dataset_id))
+
+    def report_path(self, dataset_id: str) -> Optional[Path]:
+        row = self._connect().execute(
+            'SELECT report_path FROM datasets WHERE dataset_id = ?', (dataset_id,)).fetchone()
+        return Path(row[0]) if row and row[0] else None
+
+    def save_job(self, state: Dict[str, Any], result: Any = None) -> None:
+        """Записать состояние задачи (словарь Job.to_dict()) и её результат"""
+        try:
+            encoded = json.dumps(result, default=str) if result is not None else None
+        except (TypeError, ValueError):
+            encoded = None
+        self._connect().execute(
+            'INSERT INTO jobs (job_id, kind, dataset_id, status, progress, message, error, result, '
+            'created, finished, owner) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (job_id) DO UPDATE SET status = excluded.status, progress = excluded.progress, '
+            'message = excluded.message, error = excluded.error, result = excluded.result, '
+            'finished = excluded.finished',
+            (state['job_id'], state['kind'], state['dataset_id'], state['status'], state['progress'],
+             state['message'], state['error'], encoded, state['created'], state['finished'], os.getpid()))
+
+    def update_job(self, job_id: str, progress: float, message: str, status: str) -> None:
+        self._connect().execute('UPDATE jobs SET progress = ?, message = ?, status = ? '
+                                'WHERE job_id = ? AND finished IS NULL',
+                                (progress, message, status, job_id))
+
+    def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Состояние задачи вместе с результатом (ключ 'result')"""
+        cursor = self._connect().execute(
+            'SELECT job_id, kind, dataset_id, status, progress, message, error, result, created, finished '
+            'FROM jobs WHERE job_id = ?', (job_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        state = dict(zip([column[0] for column in cursor.description], row))
+        state['result'] = json.loads(state['result']) if state['result'] is not None else None
+        return state
+
+    def request_cancel(self, job_id: str) -> None:
+        """Попросить воркер-владелец отменить задачу"""
+        self._connect().execute('UPDATE jobs SET cancel_requested = 1 WHERE job_id = ? AND finished IS NULL',
+                                (job_id,))
+
+    def cancel_requests(self, owner: int) -> List[str]:
+        """Задачи этого процесса, отмену которых запросили другие воркеры"""
+        rows = self._connect().execute(
+            'SELECT job_id FROM jobs WHERE owner = ? AND cancel_requested = 1 AND finished IS NULL',
+            (owner,)).fetchall()
+        return [row[0] for row in rows]
+
+    def is_busy(self, dataset_id: str) -> bool:
+        """Обрабатывает ли датасет какой-нибудь живой воркер"""
+        rows = self._connect().execute(
+            'SELECT owner FROM jobs WHERE dataset_id = ? AND finished IS NULL', (dataset_id,)).fetchall()
+        return any(_alive(row[0]) for row in rows)
+
+
+class SharedDatasetStore(DatasetStore):
+    """
+    Хранилище датасетов, общее для нескольких воркеров uvicorn.
+
+    Каждая версия датасета пишется в файл Arrow IPC на локальном диске,
+    а путь и номер версии — в SessionIndex. Воркеры читают файл через
+    memory map без копирования числовых столбцов, поэтому страницы данных
+    делятся между процессами через кэш ОС. Словарь в памяти служит лишь
+    кэшем открытых версий и сверяется с индексом при каждом обращении.
+    """
+
+    def __init__(self, index: SessionIndex, shared_dir: str = 'shared_datasets',
+                 max_bytes: int = 2 * 1024 ** 3):
+        super().__init__(max_bytes=max_bytes, spill_dir=shared_dir)
+        self.index = index
+        self._versions: Dict[str, int] = {}
+
+    def __contains__(self, dataset_id: str) -> bool:
+        return self.index.dataset(dataset_id) is not None
+
+    def put(self, dataset_id: str, df: pd.DataFrame) -> None:
+        path = self._write_spill(f'{dataset_id}-{uuid.uuid4().hex[:8]}', df)
+        version, previous = self.index.set_dataset(dataset_id, path)
+        with self._lock:
+            self._meta.pop(dataset_id, None)
+            self._versions[dataset_id] = version
+            self._put_memory(dataset_id, df)
+        if previous is not None and previous != path:
+            self._unlink(previous)
+
+    def get(self, dataset_id: str) -> pd.DataFrame:
+        entry = self.index.dataset(dataset_id)
+        while True:
+            if entry is None:
+                raise KeyError(dataset_id)
+            path, version = entry
+            with self._lock:
+                if dataset_id in self._memory and self._versions.get(dataset_id) == version:
+                    self._memory.move_to_end(dataset_id)
+                    return self._memory[dataset_id]
+            try:
+                df = self._read_spill(path)
+                break
+            except FileNotFoundError:
+                # Между чтением индекса и файла другой воркер заменил или удалил
+                # датасет и стёр старый файл: берём из индекса новую версию
+                current = self.index.dataset(dataset_id)
+                if current == entry:
+                    raise
+                entry = current
+        with self._lock:
+            # Датасет заменили в другом воркере: посчитанные по старой версии данные не годятся
+            if self._versions.get(dataset_id) != version:
+                self._meta.pop(dataset_id, None)
+            self._versions[dataset_id] = version
+            self._put_memory(dataset_id, df)
+        return df
+
+    def register_file(self, dataset_id: str, path: Path) -> None:
+        _, previous = self.index.set_dataset(dataset_id, Path(path))
+        with self._lock:
+            self._meta.pop(dataset_id, None)
+            self._forget_memory(dataset_id)
+            self._versions.pop(dataset_id, None)
+        if previous is not None and previous != Path(path):
+            self._unlink(previous)
+
+    def delete(self, dataset_id: str) -> None:
+        paths = self.index.delete_dataset(dataset_id)
+        with self._lock:
+            self._forget_memory(dataset_id)
+            self._versions.pop(dataset_id, None)
+            self._meta.pop(dataset_id, None)
+        for path in paths or ():
+            if path is not None:
+                self._unlink(path)
+        # Отчёт, отвязанный при замене датасета, в индексе уже не числится
+        self._unlink(self._report_file(dataset_id))
+
+    def _report_file(self, dataset_id: str) -> Path:
+        return self.spill_dir / f'{dataset_id}.report.html'
+
+    def set_report(self, dataset_id: str, html: str) -> None:
+        path = self._report_file(dataset_id)
+        temp = path.with_suffix('.tmp')
+        temp.write_text(html, encoding='utf-8')
+        os.replace(temp, path)
+        self.index.set_report(dataset_id, path)
+
+    def get_report(self, dataset_id: Optional[str]) -> Optional[str]:
+        path = self.index.report_path(dataset_id) if dataset_id else None
+        if path is None:
+            return None
+        try:
+            return path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            # Отчёт стёр другой воркер, заменив датасет
+            return None
+
+    def _evict(self, keep: str) -> None:
+        # Все версии уже лежат на диске: вытеснение просто отпускает кэш
+        while self.used_bytes > self.max_bytes and len(self._memory) > 1:
+            dataset_id = next(iter(self._memory))
+            if dataset_id == keep:
+                self._memory.move_to_end(dataset_id)
+                continue
+            self._forget_memory(dataset_id)
+            self._versions.pop(dataset_id, None)
+
+    def _write_spill(self, name: str, df: pd.DataFrame) -> Path:
+        path = self.spill_dir / f'{name}.arrow'
+        temp = path.with_suffix('.tmp')
+        try:
+            table = pa.Table.from_pandas(df)
+            with pa.OSFile(str(temp), 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        except (ValueError, TypeError, pa.ArrowException):
+            # Смешанные типы в object-столбцах Arrow не принимает
+            temp.unlink(missing_ok=True)
+            path = self.spill_dir / f'{name}.pkl'
+            df.to_pickle(temp)
+        os.replace(temp, path)
+        return path
+
+    @staticmethod
+    def _read_spill(path: Path) -> pd.DataFrame:
+        if path.suffix == '.arrow':
+            with pa.memory_map(str(path), 'r') as source:
+                table = ipc.open_file(source).read_all()
+            # split_blocks позволяет отдать числовые столбцы без копирования из отображения
+            return table.to_pandas(split_blocks=True)
+        return DatasetStore._read_spill(path)
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        try:
+            path.unlink(missing_ok=True)
+        except OSError:
+            # Windows не даёт удалить файл, пока его отображает другой воркер
+            pass
@@ -0,0 +1,145 @@
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+
+class DatasetStore:
+    """
+    Хранилище датасетов веб-сервиса с изоляцией по сессиям.
+
+    Каждый загруженный файл получает собственный dataset_id. В памяти
+    держится не больше max_bytes данных (LRU по времени обращения),
+    вытесненные датасеты сбрасываются на диск в Parquet и поднимаются
+    обратно при следующем обращении.
+    """
+
+    def __init__(self, max_bytes: int = 2 * 1024 ** 3, spill_dir: str = 'temp_datasets'):
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir)
+        self.spill_dir.mkdir(exist_ok=True)
+        self.used_bytes = 0
+        self._memory: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._spilled: Dict[str, Path] = {}
+        self._reports: Dict[str, str] = {}
+        self._meta: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+
+    def __contains__(self, dataset_id: str) -> bool:
+        with self._lock:
+            return dataset_id in self._memory or dataset_id in self._spilled
+
+    def create(self, df: pd.DataFrame) -> str:
+        """Положить новый датасет и вернуть его идентификатор"""
+        dataset_id = uuid.uuid4().hex
+        self.put(dataset_id, df)
+        return dataset_id
+
+    def put(self, dataset_id: str, df: pd.DataFrame) -> None:
+        """Сохранить (или заменить) датасет"""
+        with self._lock:
+            self._meta.pop(dataset_id, None)
+            self._reports.pop(dataset_id, None)
+            self._forget_spill(dataset_id)
+            self._put_memory(dataset_id, df)
+
+    def meta(self, dataset_id: str) -> dict:
+        """
+        Служебные данные, посчитанные по текущей версии датасета
+        (отпечатки, индексы). Сбрасываются при замене датасета вместе с отчётом.
+        """
+        with self._lock:
+            return self._meta.setdefault(dataset_id, {})
+
+    def get(self, dataset_id: str) -> pd.DataFrame:
+        """Получить датасет; KeyError, если такого нет"""
+        with self._lock:
+            if dataset_id in self._memory:
+                self._memory.move_to_end(dataset_id)
+                return self._memory[dataset_id]
+            path = self._spilled.get(dataset_id)
+            if path is None:
+                raise KeyError(dataset_id)
+            df = self._read_spill(path)
+            self._forget_spill(dataset_id)
+            self._put_memory(dataset_id, df)
+            return df
+
+    def spill_path(self, dataset_id: str) -> Path:
+        """Куда класть Parquet-файл датасета"""
+        return self.spill_dir / f'{dataset_id}.parquet'
+
+    def register_file(self, dataset_id: str, path: Path) -> None:
+        """Зарегистрировать датасет, уже записанный на диск в Parquet"""
+        with self._lock:
+            self._meta.pop(dataset_id, None)
+            self._reports.pop(dataset_id, None)
+            self._forget_memory(dataset_id)
+            if self._spilled.get(dataset_id) != Path(path):
+                self._forget_spill(dataset_id)
+            self._spilled[dataset_id] = Path(path)
+
+    def delete(self, dataset_id: str) -> None:
+        with self._lock:
+            self._forget_memory(dataset_id)
+            self._forget_spill(dataset_id)
+            self._reports.pop(dataset_id, None)
+            self._meta.pop(dataset_id, None)
+
+    def set_report(self, dataset_id: str, html: str) -> None:
+        with self._lock:
+            self._reports[dataset_id] = html
+
+    def get_report(self, dataset_id: Optional[str]) -> Optional[str]:
+        with self._lock:
+            return self._reports.get(dataset_id)
+
+    def _put_memory(self, dataset_id: str, df: pd.DataFrame) -> None:
+        self._forget_memory(dataset_id)
+        size = int(df.memory_usage(deep=True).sum())
+        self._memory[dataset_id] = df
+        self._sizes[dataset_id] = size
+        self.used_bytes += size
+        self._evict(keep=dataset_id)
+
+    def _evict(self, keep: str) -> None:
+        """Сбрасывать на диск самые давние датасеты, пока не влезем в лимит"""
+        while self.used_bytes > self.max_bytes and len(self._memory) > 1:
+            dataset_id = next(iter(self._memory))
+            if dataset_id == keep:
+                self._memory.move_to_end(dataset_id)
+                continue
+            df = self._memory[dataset_id]
+            self._spilled[dataset_id] = self._write_spill(dataset_id, df)
+            self._forget_memory(dataset_id)
+
+    def _forget_memory(self, dataset_id: str) -> None:
+        if dataset_id in self._memory:
+            del self._memory[dataset_id]
+            self.used_bytes -= self._sizes.pop(dataset_id)
+
+    def _forget_spill(self, dataset_id: str) -> None:
+        path = self._spilled.pop(dataset_id, None)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def _write_spill(self, dataset_id: str, df: pd.DataFrame) -> Path:
+        path = self.spill_path(dataset_id)
+        try:
+            df.to_parquet(path)
+        except (ValueError, TypeError, ImportError):
+            # Смешанные типы в object-столбцах Parquet не принимает
+            path.unlink(missing_ok=True)
+            path = self.spill_dir / f'{dataset_id}.pkl'
+            df.to_pickle(path)
+        return path
+
+    @staticmethod
+    def _read_spill(path: Path) -> pd.DataFrame:
+        if path.suffix == '.parquet':
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
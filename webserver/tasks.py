@@ -0,0 +1,43 @@
+import json
+import pandas as pd
+from typing import Optional
+from IDProcessing import DataObject, IDProcessing
+from ydata_profiling import ProfileReport
+from webserver.reports import sample_frame
+from Logger.metrics import timed
+
+# Функции выполняются в процессах пула, поэтому живут на уровне модуля
+
+REPORT_TITLE = f"Your New Magic Data {chr(129392)} \u2728... or not, if you just loaded it {chr(128577)}"
+
+
+def process_dataset(method_id: int, df: pd.DataFrame, progress=None) -> pd.DataFrame:
+    data = DataObject(method_id=method_id, params=[df])
+    return IDProcessing(data, progress_callback=progress).get()
+
+
+def build_report(df: pd.DataFrame, mode: str = 'full', sample: Optional[int] = None, progress=None) -> str:
+    progress = progress or (lambda fraction, message='': None)
+    progress(0.0, "Сбор статистики")
+    frame = sample_frame(df, sample)
+    with timed('ProfileReport', rows=len(frame), nbytes=int(frame.memory_usage(index=True).sum())):
+        profile = ProfileReport(frame, title=REPORT_TITLE, minimal=(mode == 'minimal'))
+        profile.get_description()
+        progress(0.8, "Построение HTML")
+        report_html = profile.to_html()
+    progress(1.0, "Отчёт готов")
+    return report_html
+
+
+def build_column_sections(df: pd.DataFrame, columns: list, mode: str = 'full',
+                          sample: Optional[int] = None, progress=None) -> dict:
+    """Разделы отчёта (статистика variables) только для перечисленных столбцов"""
+    progress = progress or (lambda fraction, message='': None)
+    progress(0.0, f"Статистика по столбцам: {len(columns)}")
+    frame = sample_frame(df, sample)
+    frame = frame[[col for col in frame.columns if str(col) in columns]]
+    with timed('ProfileReport', rows=len(frame), nbytes=int(frame.memory_usage(index=True).sum())):
+        profile = ProfileReport(frame, minimal=(mode == 'minimal'), progress_bar=False)
+        sections = json.loads(profile.to_json())['variables']
+    progress(1.0, "Статистика готова")
+    return {str(col): section for col, section in sections.items()}